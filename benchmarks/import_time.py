@@ -0,0 +1,68 @@
+"""Measure cold-start cost: importing the client and building a service in a fresh interpreter.
+
+Each case runs in its own subprocess so module caches never carry over. Run from the
+repository root:
+
+    python -m benchmarks.import_time --runs 20
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ("asyncio", "requests", "sendgrid", "aiohttp", "sqlite3")
+
+CASES = {
+    "import_client": "import notify_lib.client",
+    "sms_service": (
+        "from notify_lib.client import NotificationClient\n"
+        "NotificationClient({'sms': {'providers': [{'name': 'twofactor', 'credentials': {'api_key': 'x'}}]}}).sms"
+    ),
+    "email_service": (
+        "from notify_lib.client import NotificationClient\n"
+        "NotificationClient({'email': {'providers': [{'name': 'sendgrid', "
+        "'credentials': {'api_key': 'SG.x', 'from_email': 'a@example.com'}}]}}).email"
+    ),
+}
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"ms": elapsed * 1000, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def run_case(code: str, runs: int) -> dict:
+    samples = []
+    loaded = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(code=code, heavy=HEAVY_MODULES)],
+            check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        samples.append(result["ms"])
+        loaded = result["loaded"]
+    return {
+        "median_ms": round(statistics.median(samples), 2),
+        "min_ms": round(min(samples), 2),
+        "heavy_modules_loaded": loaded,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    print(json.dumps({
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "cases": {name: run_case(code, args.runs) for name, code in CASES.items()},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Compare the memory held by a large SMS campaign in each item representation.
+
+Run from the repository root:
+
+    python -m benchmarks.item_memory --items 1000000
+"""
+import argparse
+import gc
+import json
+import tracemalloc
+
+from notify_lib.models.batch import SmsItemBatch
+from notify_lib.models.items import SmsItem
+
+MESSAGE = "Big sale this weekend! Up to 50% off on groceries."
+
+
+class DictSmsItem:
+    # Same fields as SmsItem, stored in a per-instance __dict__ like the original classes
+
+    def __init__(self, phone_number, message):
+        self.recipient = phone_number
+        self.message = message
+        self.delivery_status = "PENDING"
+        self.ext_id = None
+        self.error = None
+        self.error_category = None
+        self.otp = None
+        self.template_name = None
+        self.dlt_data = None
+        self.variables = None
+
+
+def measure(build, count: int) -> int:
+    gc.collect()
+    tracemalloc.start()
+    built = build(count)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del built
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=1000000)
+    args = parser.parse_args()
+
+    # Recipient strings are shared across runs so only the per-item overhead is compared
+    recipients = [f"98{i:08d}" for i in range(args.items)]
+
+    results = {
+        "dict_items": measure(lambda n: [DictSmsItem(r, MESSAGE) for r in recipients], args.items),
+        "slotted_items": measure(lambda n: [SmsItem(r, MESSAGE) for r in recipients], args.items),
+        "columnar_batch": measure(lambda n: SmsItemBatch(recipients, MESSAGE), args.items),
+    }
+    print(json.dumps({
+        "items": args.items,
+        "bytes": results,
+        "bytes_per_item": {name: round(size / args.items, 1) for name, size in results.items()},
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""End-to-end send benchmarks against local stand-ins for 2Factor and SendGrid.
+
+Each scenario sends through a NotificationClient pointed at benchmarks.standin and
+reports throughput, per-request latency percentiles and peak traced memory as JSON.
+Run from the repository root:
+
+    python -m benchmarks.send_throughput --items 2000 --large-items 50000 --latency 0.01 \\
+        --error-rate 0.01 --throttle-rate 0.01 --output results.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+
+from benchmarks.standin import StandinServer
+from notify_lib.client import NotificationClient
+from notify_lib.constants import MessageType
+from notify_lib.metrics import REQUEST_SECONDS, RETRIES, MetricsSink
+from notify_lib.models.batch import EmailItemBatch, SmsItemBatch
+from notify_lib.models.items import EmailItem, SmsItem
+from notify_lib.models.notifications import EmailNotification, SmsNotification
+
+
+class SampleMetrics(MetricsSink):
+    # Keeps raw request latencies so percentiles are exact rather than bucketed
+
+    def __init__(self):
+        self.latencies = []
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def increment(self, name, value=1, **labels):
+        if name == RETRIES:
+            with self._lock:
+                self.retries += value
+
+    def observe(self, name, value, **labels):
+        if name == REQUEST_SECONDS:
+            with self._lock:
+                self.latencies.append(value)
+
+
+def percentile(samples, q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def build_config(server: StandinServer, sms_options=None, email_options=None) -> dict:
+    options = server.provider_options()
+    provider = {"max_retries": 3, "retry_backoff": 0.01, "retry_backoff_max": 0.1, "max_concurrency": 100}
+    return {
+        "sms": {"providers": [dict(
+            provider, name="twofactor", credentials={"api_key": "bench", "sender_id": "BENCH"},
+            options=dict(options, **(sms_options or {})))]},
+        "email": {"providers": [dict(
+            provider, name="sendgrid", credentials={"api_key": "SG.bench", "from_email": "bench@example.com"},
+            options=dict(options, **(email_options or {})))]},
+    }
+
+
+def sms_notification(count: int, message_type=MessageType.TRANSACTIONAL.value) -> SmsNotification:
+    notification = SmsNotification(sender_id="BENCH", message_type=message_type)
+    for i in range(count):
+        notification.add_item(SmsItem(f"98{i:08d}", f"Your order #{i} has been shipped.", otp=f"{i % 1000000:06d}"))
+    return notification
+
+
+def email_notification(count: int) -> EmailNotification:
+    notification = EmailNotification(from_email="bench@example.com")
+    for i in range(count):
+        notification.add_item(EmailItem(
+            f"user{i}@example.com", "<p>Your order has shipped.</p>", subject=f"Order #{i}",
+            variables={"order": i}))
+    return notification
+
+
+def large_sms_notification(count: int) -> SmsNotification:
+    notification = SmsNotification(sender_id="BENCH", message_type=MessageType.PROMOTIONAL.value)
+    notification.items = SmsItemBatch([f"98{i:08d}" for i in range(count)], "Big sale this weekend!")
+    return notification
+
+
+def large_email_notification(count: int) -> EmailNotification:
+    notification = EmailNotification(from_email="bench@example.com")
+    notification.items = EmailItemBatch(
+        [f"user{i}@example.com" for i in range(count)], "<p>Big sale this weekend!</p>", subject="Weekend sale")
+    return notification
+
+
+def scenarios(args):
+    # name -> (2Factor options, SendGrid options, notification builder, channel, async)
+    return {
+        "sms_sync": ({}, {}, lambda: sms_notification(args.items), "sms", False),
+        "sms_async": ({}, {}, lambda: sms_notification(args.items), "sms", True),
+        "otp_async": ({}, {}, lambda: sms_notification(args.items, MessageType.OTP.value), "sms", True),
+        "sms_bulk_large": (
+            {"bulk_sms": True}, {}, lambda: large_sms_notification(args.large_items), "sms", True),
+        "email_sync": ({}, {}, lambda: email_notification(args.items), "email", False),
+        "email_async_large": ({}, {}, lambda: large_email_notification(args.large_items), "email", True),
+    }
+
+
+def run_once(server, spec, trace_memory: bool):
+    sms_options, email_options, build, channel, is_async = spec
+    metrics = SampleMetrics()
+    client = NotificationClient(build_config(server, sms_options, email_options), metrics=metrics)
+    service = getattr(client, channel)
+    notification = build()
+
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    if is_async:
+        async def send():
+            try:
+                await service.async_process(notification)
+            finally:
+                await service.aclose()
+        asyncio.run(send())
+    else:
+        service.process(notification)
+    elapsed = time.perf_counter() - started
+    peak = None
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    statuses = {}
+    for item in notification.items:
+        statuses[item.delivery_status] = statuses.get(item.delivery_status, 0) + 1
+    return elapsed, peak, metrics, statuses, len(notification.items)
+
+
+def run_scenario(server, spec, measure_memory: bool) -> dict:
+    elapsed, _, metrics, statuses, count = run_once(server, spec, trace_memory=False)
+    result = {
+        "items": count,
+        "seconds": round(elapsed, 4),
+        "items_per_second": round(count / elapsed, 1) if elapsed else None,
+        "requests": len(metrics.latencies),
+        "retried_items": metrics.retries,
+        "latency_p50_ms": round(percentile(metrics.latencies, 0.50) * 1000, 3),
+        "latency_p99_ms": round(percentile(metrics.latencies, 0.99) * 1000, 3),
+        "statuses": statuses,
+    }
+    if measure_memory:
+        # Tracing slows allocation down, so memory comes from a separate run
+        _, peak, _, _, _ = run_once(server, spec, trace_memory=True)
+        result["peak_memory_bytes"] = peak
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--large-items", type=int, default=50000)
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds added by the stand-in per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with a 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered with a 429")
+    parser.add_argument("--scenario", action="append", help="run only these scenarios (repeatable)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the traced-memory runs")
+    parser.add_argument("--output", help="also write the JSON results to this file")
+    args = parser.parse_args()
+
+    server = StandinServer(
+        latency=args.latency, error_rate=args.error_rate, throttle_rate=args.throttle_rate).start()
+    try:
+        results = {}
+        for name, spec in scenarios(args).items():
+            if args.scenario and name not in args.scenario:
+                continue
+            results[name] = run_scenario(server, spec, not args.no_memory)
+    finally:
+        server.stop()
+
+    report = {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "server": {"latency": args.latency, "error_rate": args.error_rate, "throttle_rate": args.throttle_rate},
+        "scenarios": results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
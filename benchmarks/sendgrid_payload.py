@@ -0,0 +1,60 @@
+"""Compare the direct SendGrid body builder against the sendgrid helper objects.
+
+Run from the repository root:
+
+    python -m benchmarks.sendgrid_payload --items 1000 --rounds 20
+"""
+import argparse
+import json
+import timeit
+
+from notify_lib.models.items import EmailItem
+from notify_lib.models.notifications import EmailNotification
+from notify_lib.vendors.implementations.email.sendgrid import SendGridEmail
+
+
+def build_notification(count: int) -> EmailNotification:
+    notification = EmailNotification(from_email="Shop <noreply@example.com>")
+    notification.template_id = "d-0000000000"
+    notification.categories = ["newsletter", "weekly"]
+    notification.reply_to = "support@example.com"
+    for i in range(count):
+        notification.add_item(EmailItem(
+            to_email=f"user{i}@example.com",
+            message="<p>Hello {{name}}</p>",
+            subject="Weekly digest",
+            variables={"name": f"User {i}", "order": i, "tier": "gold"},
+            cc=[f"cc{i}@example.com"] if i % 10 == 0 else None,
+            bcc=["audit@example.com", "AUDIT@example.com"] if i % 25 == 0 else None))
+    return notification
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    vendor = SendGridEmail({"api_key": "benchmark", "from_email": "noreply@example.com"})
+    notification = build_notification(args.items)
+
+    helper_body = json.dumps(vendor._build_mail(notification).get())
+    direct_body = json.dumps(vendor._build_request_body(notification))
+    if helper_body != direct_body:
+        raise SystemExit("direct builder output differs from the helper output")
+
+    helper = timeit.timeit(lambda: json.dumps(vendor._build_mail(notification).get()), number=args.rounds)
+    direct = timeit.timeit(lambda: json.dumps(vendor._build_request_body(notification)), number=args.rounds)
+
+    print(json.dumps({
+        "items": args.items,
+        "rounds": args.rounds,
+        "helper_ms_per_batch": round(helper / args.rounds * 1000, 3),
+        "direct_ms_per_batch": round(direct / args.rounds * 1000, 3),
+        "speedup": round(helper / direct, 2),
+        "identical": True,
+    }))
+
+
+if __name__ == "__main__":
+    main()
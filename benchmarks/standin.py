@@ -0,0 +1,193 @@
+"""Local stand-ins for the 2Factor R1/V1 and SendGrid v3 endpoints.
+
+With `--track-deliveries`, every accepted recipient gets a final delivery outcome
+(`--undelivered-rate` of them fail). The 2Factor report endpoint serves them per session id, and
+GET /standin/reports/2factor and /standin/reports/sendgrid return them as DLR callback and event
+webhook bodies. Used by the send
+benchmarks, or on its own to point a development client at:
+
+    python -m benchmarks.standin --port 8025 --latency 0.02 --error-rate 0.01 --throttle-rate 0.01
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, port: int = 0, latency: float = 0.0, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, seed: int = 0,
+                 track_deliveries: bool = False, undelivered_rate: float = 0.0):
+        super().__init__(("127.0.0.1", port), StandinHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.undelivered_rate = undelivered_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        # ext_id -> [(recipient, "DELIVERED" | "UNDELIVERED")]; off by default so send
+        # benchmarks do not trace memory held by the stand-in
+        self.outcomes = {} if track_deliveries else None
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def provider_options(self) -> dict:
+        # ProviderConfig.options pointing both vendors at this server
+        return {
+            "api_url": f"{self.url}/API/R1/",
+            "api_url_v1": f"{self.url}/API/V1/",
+            "api_host": self.url,
+        }
+
+    def injected_failure(self):
+        # Returns the failure status to inject, if any, and a request id unique to this call
+        with self.lock:
+            self.requests += 1
+            request_id = f"{self.requests:012d}"
+            roll = self.random.random()
+        if roll < self.throttle_rate:
+            return 429, request_id
+        if roll < self.throttle_rate + self.error_rate:
+            return 500, request_id
+        return None, request_id
+
+    def record(self, ext_id: str, recipients):
+        if self.outcomes is None:
+            return
+        with self.lock:
+            self.outcomes[ext_id] = [
+                (recipient, "UNDELIVERED" if self.random.random() < self.undelivered_rate else "DELIVERED")
+                for recipient in recipients]
+
+    def twofactor_reports(self) -> list:
+        with self.lock:
+            outcomes = [(ext_id, list(recipients)) for ext_id, recipients in (self.outcomes or {}).items()]
+        return [
+            {"SessionId": ext_id, "Number": number, "Status": status}
+            for ext_id, recipients in outcomes if not ext_id.startswith("standin-")
+            for number, status in recipients]
+
+    def sendgrid_events(self) -> list:
+        with self.lock:
+            outcomes = [(ext_id, list(recipients)) for ext_id, recipients in (self.outcomes or {}).items()]
+        return [
+            {"email": email, "event": "delivered" if status == "DELIVERED" else "bounce",
+             "sg_message_id": f"{ext_id}.filter0001.{index}",
+             "reason": None if status == "DELIVERED" else "550 bounced"}
+            for ext_id, recipients in outcomes if ext_id.startswith("standin-")
+            for index, (email, status) in enumerate(recipients)]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, name="standin", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; without this, delayed ACKs add ~40ms per keep-alive call
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, body: str = "", headers=None):
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(payload)))
+        if payload:
+            self.send_header("Content-Type", "application/json")
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _serve(self, body: bytes):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        failure, request_id = self.server.injected_failure()
+        if failure == 429:
+            return self._reply(429, json.dumps({"Status": "Error", "Details": "Too many requests"}),
+                               {"Retry-After": "1"})
+        if failure:
+            return self._reply(failure, json.dumps({"Status": "Error", "Details": "Internal error"}))
+
+        path = self.path.split("?", 1)[0]
+        if path.startswith("/v3/mail/send"):
+            if not self.headers.get("Authorization", "").startswith("Bearer "):
+                return self._reply(401, json.dumps({"errors": [{"message": "authorization required"}]}))
+            mail = json.loads(body or b"{}")
+            message_id = f"standin-{request_id}"
+            self.server.record(message_id, [
+                to["email"] for personalization in mail.get("personalizations", [])
+                for to in personalization.get("to", [])])
+            return self._reply(202, "", {"X-Message-Id": message_id})
+        if path.startswith("/API/V1/"):
+            parts = path.split("/")
+            if len(parts) == 8 and parts[4:7] == ["ADDON_SERVICES", "RPT", "TSMS"]:
+                # /API/V1/{api_key}/ADDON_SERVICES/RPT/TSMS/{session_id}
+                outcome = (self.server.outcomes or {}).get(parts[7])
+                if not outcome:
+                    return self._reply(200, json.dumps({"Status": "Error", "Details": "Invalid session id"}))
+                return self._reply(200, json.dumps({"Status": "Success", "Details": outcome[0][1]}))
+            # /API/V1/{api_key}/SMS/{phone}/{otp}[/{template}]
+            if len(parts) < 7 or parts[4] != "SMS":
+                return self._reply(400, json.dumps({"Status": "Error", "Details": "Invalid request"}))
+            self.server.record(f"otp-{request_id}", [parts[5]])
+            return self._reply(200, json.dumps({"Status": "Success", "Details": f"otp-{request_id}"}))
+        if path.startswith("/API/R1"):
+            form = parse_qs(body.decode("utf-8"))
+            if not form.get("to") or not form.get("msg"):
+                return self._reply(200, json.dumps({"Status": "Error", "Details": "Missing to or msg"}))
+            self.server.record(f"sms-{request_id}", form["to"][0].split(","))
+            return self._reply(200, json.dumps({"Status": "Success", "Details": f"sms-{request_id}"}))
+        if path == "/standin/reports/2factor":
+            return self._reply(200, json.dumps(self.server.twofactor_reports()))
+        if path == "/standin/reports/sendgrid":
+            return self._reply(200, json.dumps(self.server.sendgrid_events()))
+        return self._reply(404, json.dumps({"Status": "Error", "Details": "Not found"}))
+
+    def do_GET(self):
+        self._serve(b"")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self._serve(self.rfile.read(length) if length else b"")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--track-deliveries", action="store_true")
+    parser.add_argument("--undelivered-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = StandinServer(
+        args.port, args.latency, args.error_rate, args.throttle_rate,
+        track_deliveries=args.track_deliveries, undelivered_rate=args.undelivered_rate)
+    print(json.dumps(server.provider_options()))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Measure message template rendering in the send pipeline against formatting by the caller.
+
+Renders one campaign three ways: the caller formatting every body itself, the template parsed
+again for every item, and the pipeline's cached templates. Also reports the memory held by
+items carrying expanded bodies versus a template reference; the variable dicts are built up
+front and shared, since the caller holds them either way. Run from the repository root:
+
+    python -m benchmarks.template_render --items 200000
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from notify_lib.models.items import SmsItem
+from notify_lib.templates import MessageTemplate, TemplateCache
+
+TEMPLATE = "Hi {name}, your order #{order} has been shipped and will arrive on {date}."
+
+
+def variables(count: int):
+    return [{"name": f"Customer {i}", "order": i, "date": "12 Oct"} for i in range(count)]
+
+
+def timed(run, items) -> float:
+    started = time.perf_counter()
+    run(items)
+    return time.perf_counter() - started
+
+
+def caller_format(items):
+    for item in items:
+        item.message = TEMPLATE.format(**item.variables)
+
+
+def parse_per_item(items):
+    for item in items:
+        item.message = MessageTemplate(item.message_template).render(item.variables, item)
+
+
+def pipeline(items):
+    render = TemplateCache().renderer()
+    for item in items:
+        render(item)
+
+
+def measure(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    built = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del built
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=200000)
+    args = parser.parse_args()
+
+    recipients = [f"98{i:08d}" for i in range(args.items)]
+    values = variables(args.items)
+    items = [SmsItem(r, message_template=TEMPLATE, variables=v) for r, v in zip(recipients, values)]
+
+    seconds = {name: timed(run, items) for name, run in (
+        ("caller_format", caller_format), ("parse_per_item", parse_per_item), ("pipeline", pipeline))}
+    memory = {
+        "expanded_bodies": measure(lambda: [SmsItem(r, TEMPLATE.format(**v)) for r, v in zip(recipients, values)]),
+        "template_reference": measure(
+            lambda: [SmsItem(r, message_template=TEMPLATE, variables=v) for r, v in zip(recipients, values)]),
+    }
+    print(json.dumps({
+        "items": args.items,
+        "items_per_second": {name: round(args.items / elapsed) for name, elapsed in seconds.items()},
+        "bytes_per_item": {name: round(size / args.items, 1) for name, size in memory.items()},
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,50 @@
-from notify_lib.config import NotifyConfig
+import threading
+from typing import Optional
+
+from notify_lib.config import NotifyConfig, load_notify_config
 from notify_lib.constants import Channel
+from notify_lib.metrics import NULL_METRICS, MetricsSink
 from notify_lib.services.lazy_service import LazyService
 from notify_lib.services.service_factory import ServiceFactory
 
 
 class NotificationClient:
 
-    def __init__(self, config: NotifyConfig):
-        self.config = config or {}
+    def __init__(self, config: NotifyConfig, metrics: Optional[MetricsSink] = None):
+        # Normalized and validated once; services are built from the result
+        self.config = load_notify_config(config or {})
+        self.metrics = metrics or NULL_METRICS
+        self._reload_lock = threading.Lock()
 
-    sms = LazyService(lambda self: ServiceFactory.create_service(Channel.SMS.value, self.config))
-    email = LazyService(lambda self: ServiceFactory.create_service(Channel.EMAIL.value, self.config))
+    sms = LazyService(lambda self: ServiceFactory.build_service(Channel.SMS.value, self.config, self.metrics))
+    email = LazyService(lambda self: ServiceFactory.build_service(Channel.EMAIL.value, self.config, self.metrics))
 
+    def reload(self, config: NotifyConfig):
+        # Rebuilds the services already in use from `config`. Vendors whose provider config is
+        # unchanged are reused, rebuilt ones take over the old instances' pools, rate-limit
+        # buckets and adaptive setpoints, and breakers follow providers by name. Every
+        # replacement is built before any is swapped in, so an invalid config changes nothing;
+        # sends already running finish on the service they started on, which then closes the
+        # pools and stores its replacement did not adopt
+        config = load_notify_config(config)
+        with self._reload_lock:
+            swaps = []
+            for channel, descriptor, channel_config in (
+                    (Channel.SMS.value, NotificationClient.sms, config.sms),
+                    (Channel.EMAIL.value, NotificationClient.email, config.email)):
+                current = getattr(self, descriptor.attr_name, None)
+                if current is None:
+                    continue
+                replacement = None
+                if channel_config is not None:
+                    replacement = ServiceFactory.build_service(
+                        channel, config, self.metrics, previous=current, previous_config=self.config)
+                swaps.append((descriptor.attr_name, current, replacement))
+            self.config = config
+            for attr_name, current, replacement in swaps:
+                if replacement is None:
+                    delattr(self, attr_name)
+                else:
+                    setattr(self, attr_name, replacement)
+                    replacement.attach_outbox()
+                current.retire(replacement)
@@ -1,6 +1,10 @@
 from dataclasses import dataclass, field
 from typing import List, Dict, Optional, Any
 
+from notify_lib.constants import DispatchMode
+
+ADAPTIVE_KEYS = ("target_latency", "min_concurrency", "min_batch_size", "max_batch_size")
+
 
 @dataclass
 class ProviderConfig:
@@ -9,22 +13,74 @@ class ProviderConfig:
     credentials: Optional[Dict[str, Any]] = None
     max_retries: int = 3
     timeout: int = 30
+    pool_size: int = 10
+    max_concurrency: int = 100
+    failure_threshold: int = 5
+    recovery_timeout: int = 30
+    retry_backoff: float = 0.5
+    retry_backoff_max: float = 10.0
+    rate_limit: Optional[float] = None
+    rate_burst: Optional[int] = None
+    options: Optional[Dict[str, Any]] = None
+    weight: int = 1
+    adaptive: Optional[Dict[str, Any]] = None
 
 
 @dataclass
 class SMSConfig:
     providers: List[ProviderConfig] = field(default_factory=list)
+    dispatch: str = "failover"
+    send_workers: int = 8
 
 
 @dataclass
 class EmailConfig:
     providers: List[ProviderConfig] = field(default_factory=list)
+    dispatch: str = "failover"
+    send_workers: int = 8
+
+
+@dataclass
+class OutboxConfig:
+    path: str = "notify_outbox.db"
+    workers: int = 2
+    poll_interval: float = 0.5
+    max_attempts: int = 3
+    retry_delay: float = 5.0
+    # Seconds a claimed row stays with its worker before any process may claim it again
+    lease_timeout: float = 300.0
+
+
+@dataclass
+class IdempotencyConfig:
+    backend: str = "memory"
+    ttl: float = 86400
+    max_entries: int = 100000
+    path: str = "notify_idempotency.db"
+    # Seconds a send's reservation of its keys lasts if the send never settles them
+    reservation_ttl: float = 300.0
+
+
+@dataclass
+class TemplateConfig:
+    cache_size: int = 1024
+    templates: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class ReconciliationConfig:
+    max_entries: int = 1000000
+    poll_batch_size: int = 500
 
 
 @dataclass
 class NotifyConfig:
     sms: Optional[SMSConfig] = None
     email: Optional[EmailConfig] = None
+    outbox: Optional[OutboxConfig] = None
+    idempotency: Optional[IdempotencyConfig] = None
+    templates: Optional[TemplateConfig] = None
+    reconciliation: Optional[ReconciliationConfig] = None
 
 
 # ---- Minimal dict -> dataclass builders ----
@@ -39,6 +95,17 @@ def provider_from_dict(data: Dict[str, Any]) -> ProviderConfig:
         credentials=data.get("credentials"),
         max_retries=int(data.get("max_retries", 3)) if data.get("max_retries") is not None else 3,
         timeout=int(data.get("timeout", 30)) if data.get("timeout") is not None else 30,
+        pool_size=int(data.get("pool_size", 10)) if data.get("pool_size") is not None else 10,
+        max_concurrency=int(data.get("max_concurrency", 100)) if data.get("max_concurrency") is not None else 100,
+        failure_threshold=int(data.get("failure_threshold", 5)) if data.get("failure_threshold") is not None else 5,
+        recovery_timeout=int(data.get("recovery_timeout", 30)) if data.get("recovery_timeout") is not None else 30,
+        retry_backoff=float(data.get("retry_backoff", 0.5)) if data.get("retry_backoff") is not None else 0.5,
+        retry_backoff_max=float(data.get("retry_backoff_max", 10.0)) if data.get("retry_backoff_max") is not None else 10.0,
+        rate_limit=float(data["rate_limit"]) if data.get("rate_limit") is not None else None,
+        rate_burst=int(data["rate_burst"]) if data.get("rate_burst") is not None else None,
+        options=data.get("options"),
+        weight=int(data.get("weight", 1)) if data.get("weight") is not None else 1,
+        adaptive=data.get("adaptive"),
     )
 
 
@@ -46,14 +113,61 @@ def sms_config_from_dict(data: Dict[str, Any]) -> SMSConfig:
     if not isinstance(data, dict):
         raise ValueError("SMSConfig must be a dict")
     providers = [provider_from_dict(p) for p in data.get("providers", [])]
-    return SMSConfig(providers=providers)
+    return SMSConfig(
+        providers=providers, dispatch=data.get("dispatch") or "failover",
+        send_workers=int(data.get("send_workers", 8)) if data.get("send_workers") is not None else 8)
 
 
 def email_config_from_dict(data: Dict[str, Any]) -> EmailConfig:
     if not isinstance(data, dict):
         raise ValueError("EmailConfig must be a dict")
     providers = [provider_from_dict(p) for p in data.get("providers", [])]
-    return EmailConfig(providers=providers)
+    return EmailConfig(
+        providers=providers, dispatch=data.get("dispatch") or "failover",
+        send_workers=int(data.get("send_workers", 8)) if data.get("send_workers") is not None else 8)
+
+
+def outbox_config_from_dict(data: Dict[str, Any]) -> OutboxConfig:
+    if not isinstance(data, dict):
+        raise ValueError("OutboxConfig must be a dict")
+    return OutboxConfig(
+        path=data.get("path") or "notify_outbox.db",
+        workers=int(data.get("workers", 2)) if data.get("workers") is not None else 2,
+        poll_interval=float(data.get("poll_interval", 0.5)) if data.get("poll_interval") is not None else 0.5,
+        max_attempts=int(data.get("max_attempts", 3)) if data.get("max_attempts") is not None else 3,
+        retry_delay=float(data.get("retry_delay", 5.0)) if data.get("retry_delay") is not None else 5.0,
+        lease_timeout=float(data.get("lease_timeout", 300.0)) if data.get("lease_timeout") is not None else 300.0,
+    )
+
+
+def idempotency_config_from_dict(data: Dict[str, Any]) -> IdempotencyConfig:
+    if not isinstance(data, dict):
+        raise ValueError("IdempotencyConfig must be a dict")
+    return IdempotencyConfig(
+        backend=data.get("backend") or "memory",
+        ttl=float(data.get("ttl", 86400)) if data.get("ttl") is not None else 86400,
+        max_entries=int(data.get("max_entries", 100000)) if data.get("max_entries") is not None else 100000,
+        path=data.get("path") or "notify_idempotency.db",
+        reservation_ttl=float(data.get("reservation_ttl", 300.0)) if data.get("reservation_ttl") is not None else 300.0,
+    )
+
+
+def template_config_from_dict(data: Dict[str, Any]) -> TemplateConfig:
+    if not isinstance(data, dict):
+        raise ValueError("TemplateConfig must be a dict")
+    return TemplateConfig(
+        cache_size=int(data.get("cache_size", 1024)) if data.get("cache_size") is not None else 1024,
+        templates=data.get("templates") or {},
+    )
+
+
+def reconciliation_config_from_dict(data: Dict[str, Any]) -> ReconciliationConfig:
+    if not isinstance(data, dict):
+        raise ValueError("ReconciliationConfig must be a dict")
+    return ReconciliationConfig(
+        max_entries=int(data.get("max_entries", 1000000)) if data.get("max_entries") is not None else 1000000,
+        poll_batch_size=int(data.get("poll_batch_size", 500)) if data.get("poll_batch_size") is not None else 500,
+    )
 
 
 def notify_config_from_dict(data: Dict[str, Any]) -> NotifyConfig:
@@ -61,7 +175,23 @@ def notify_config_from_dict(data: Dict[str, Any]) -> NotifyConfig:
         raise ValueError("NotifyConfig must be a dict")
     sms = sms_config_from_dict(data["sms"]) if data.get("sms") else None
     email = email_config_from_dict(data["email"]) if data.get("email") else None
-    return NotifyConfig(sms=sms, email=email)
+    outbox = outbox_config_from_dict(data["outbox"]) if data.get("outbox") else None
+    idempotency = idempotency_config_from_dict(data["idempotency"]) if data.get("idempotency") else None
+    templates = template_config_from_dict(data["templates"]) if data.get("templates") else None
+    reconciliation = reconciliation_config_from_dict(data["reconciliation"]) if data.get("reconciliation") else None
+    return NotifyConfig(
+        sms=sms, email=email, outbox=outbox, idempotency=idempotency, templates=templates,
+        reconciliation=reconciliation)
+
+
+def load_notify_config(config: Any) -> NotifyConfig:
+    # Normalizes a dict or NotifyConfig and validates it; callers keep the result instead of redoing this
+    if isinstance(config, dict):
+        config = notify_config_from_dict(config)
+    elif not isinstance(config, NotifyConfig):
+        raise ValueError("config must be a NotifyConfig or dict")
+    validate_notify_config(config)
+    return config
 
 
 # ---- Minimal validation ----
@@ -70,13 +200,76 @@ def validate_notify_config(cfg: NotifyConfig) -> None:
     if cfg.sms is not None:
         if not isinstance(cfg.sms.providers, list) or len(cfg.sms.providers) == 0:
             raise ValueError("SMSConfig.providers must be a non-empty list when sms config is provided")
+        _validate_channel_options(cfg.sms, channel="sms")
         for p in cfg.sms.providers:
             _validate_provider_config(p, channel="sms")
     if cfg.email is not None:
         if not isinstance(cfg.email.providers, list) or len(cfg.email.providers) == 0:
             raise ValueError("EmailConfig.providers must be a non-empty list when email config is provided")
+        _validate_channel_options(cfg.email, channel="email")
         for p in cfg.email.providers:
             _validate_provider_config(p, channel="email")
+    if cfg.outbox is not None:
+        _validate_outbox_config(cfg.outbox)
+    if cfg.idempotency is not None:
+        _validate_idempotency_config(cfg.idempotency)
+    if cfg.templates is not None:
+        _validate_template_config(cfg.templates)
+    if cfg.reconciliation is not None:
+        _validate_reconciliation_config(cfg.reconciliation)
+
+
+def _validate_reconciliation_config(r: ReconciliationConfig) -> None:
+    if not isinstance(r.max_entries, int) or r.max_entries < 1:
+        raise ValueError("ReconciliationConfig.max_entries must be an integer >= 1")
+    if not isinstance(r.poll_batch_size, int) or r.poll_batch_size < 1:
+        raise ValueError("ReconciliationConfig.poll_batch_size must be an integer >= 1")
+
+
+def _validate_template_config(t: TemplateConfig) -> None:
+    if not isinstance(t.cache_size, int) or t.cache_size < 1:
+        raise ValueError("TemplateConfig.cache_size must be an integer >= 1")
+    if not isinstance(t.templates, dict):
+        raise ValueError("TemplateConfig.templates must be a dict of template ID to text")
+    for template_id, text in t.templates.items():
+        if not isinstance(template_id, str) or not isinstance(text, str):
+            raise ValueError(f"TemplateConfig.templates entry {template_id!r} must map a string ID to string text")
+
+
+def _validate_idempotency_config(i: IdempotencyConfig) -> None:
+    if i.backend not in ("memory", "sqlite"):
+        raise ValueError(f"IdempotencyConfig.backend must be 'memory' or 'sqlite', got {i.backend!r}")
+    if not isinstance(i.ttl, (int, float)) or i.ttl <= 0:
+        raise ValueError("IdempotencyConfig.ttl must be a number > 0")
+    if not isinstance(i.max_entries, int) or i.max_entries < 1:
+        raise ValueError("IdempotencyConfig.max_entries must be an integer >= 1")
+    if not isinstance(i.reservation_ttl, (int, float)) or i.reservation_ttl <= 0:
+        raise ValueError("IdempotencyConfig.reservation_ttl must be a number > 0")
+    if i.backend == "sqlite" and (not isinstance(i.path, str) or not i.path.strip()):
+        raise ValueError("IdempotencyConfig.path must be a non-empty string for the sqlite backend")
+
+
+def _validate_outbox_config(o: OutboxConfig) -> None:
+    if not isinstance(o.path, str) or not o.path.strip():
+        raise ValueError("OutboxConfig.path must be a non-empty string")
+    if not isinstance(o.workers, int) or o.workers < 1:
+        raise ValueError("OutboxConfig.workers must be an integer >= 1")
+    if not isinstance(o.poll_interval, (int, float)) or o.poll_interval <= 0:
+        raise ValueError("OutboxConfig.poll_interval must be a number > 0")
+    if not isinstance(o.max_attempts, int) or o.max_attempts < 1:
+        raise ValueError("OutboxConfig.max_attempts must be an integer >= 1")
+    if not isinstance(o.retry_delay, (int, float)) or o.retry_delay < 0:
+        raise ValueError("OutboxConfig.retry_delay must be a number >= 0")
+    if not isinstance(o.lease_timeout, (int, float)) or o.lease_timeout <= 0:
+        raise ValueError("OutboxConfig.lease_timeout must be a number > 0")
+
+
+def _validate_channel_options(c, channel: str) -> None:
+    modes = [mode.value for mode in DispatchMode]
+    if c.dispatch not in modes:
+        raise ValueError(f"{channel} dispatch must be one of {modes}, got {c.dispatch!r}")
+    if not isinstance(c.send_workers, int) or c.send_workers < 1:
+        raise ValueError(f"{channel} send_workers must be an integer >= 1")
 
 
 def _validate_provider_config(p: ProviderConfig, channel: str) -> None:
@@ -88,5 +281,50 @@ def _validate_provider_config(p: ProviderConfig, channel: str) -> None:
         raise ValueError(f"ProviderConfig.max_retries must be an integer >= 0 for {channel} provider '{p.name}'")
     if not isinstance(p.timeout, int) or p.timeout <= 0:
         raise ValueError(f"ProviderConfig.timeout must be an integer > 0 for {channel} provider '{p.name}'")
+    if not isinstance(p.pool_size, int) or p.pool_size < 1:
+        raise ValueError(f"ProviderConfig.pool_size must be an integer >= 1 for {channel} provider '{p.name}'")
+    if not isinstance(p.max_concurrency, int) or p.max_concurrency < 1:
+        raise ValueError(f"ProviderConfig.max_concurrency must be an integer >= 1 for {channel} provider '{p.name}'")
+    if not isinstance(p.failure_threshold, int) or p.failure_threshold < 1:
+        raise ValueError(f"ProviderConfig.failure_threshold must be an integer >= 1 for {channel} provider '{p.name}'")
+    if not isinstance(p.recovery_timeout, int) or p.recovery_timeout <= 0:
+        raise ValueError(f"ProviderConfig.recovery_timeout must be an integer > 0 for {channel} provider '{p.name}'")
+    if not isinstance(p.retry_backoff, (int, float)) or p.retry_backoff < 0:
+        raise ValueError(f"ProviderConfig.retry_backoff must be a number >= 0 for {channel} provider '{p.name}'")
+    if not isinstance(p.retry_backoff_max, (int, float)) or p.retry_backoff_max < p.retry_backoff:
+        raise ValueError(
+            f"ProviderConfig.retry_backoff_max must be a number >= retry_backoff for {channel} provider '{p.name}'")
+    if p.rate_limit is not None and (not isinstance(p.rate_limit, (int, float)) or p.rate_limit <= 0):
+        raise ValueError(f"ProviderConfig.rate_limit must be a number > 0 or None for {channel} provider '{p.name}'")
+    if p.rate_burst is not None and (not isinstance(p.rate_burst, int) or p.rate_burst < 1):
+        raise ValueError(f"ProviderConfig.rate_burst must be an integer >= 1 or None for {channel} provider '{p.name}'")
     if p.credentials is not None and not isinstance(p.credentials, dict):
         raise ValueError(f"ProviderConfig.credentials must be a dict or None for {channel} provider '{p.name}'")
+    if not isinstance(p.weight, int) or p.weight < 1:
+        raise ValueError(f"ProviderConfig.weight must be an integer >= 1 for {channel} provider '{p.name}'")
+    if p.options is not None and not isinstance(p.options, dict):
+        raise ValueError(f"ProviderConfig.options must be a dict or None for {channel} provider '{p.name}'")
+    bulk_chunk_size = (p.options or {}).get("bulk_chunk_size", 1)
+    if not isinstance(bulk_chunk_size, int) or bulk_chunk_size < 1:
+        raise ValueError(
+            f"ProviderConfig.options.bulk_chunk_size must be an integer >= 1 for {channel} provider '{p.name}'")
+    if p.adaptive is not None:
+        _validate_adaptive(p.adaptive, p.max_concurrency, f"{channel} provider '{p.name}'")
+
+
+def _validate_adaptive(a, max_concurrency: int, owner: str) -> None:
+    if not isinstance(a, dict):
+        raise ValueError(f"ProviderConfig.adaptive must be a dict or None for {owner}")
+    unknown = sorted(set(a) - set(ADAPTIVE_KEYS))
+    if unknown:
+        raise ValueError(f"ProviderConfig.adaptive has unknown keys {unknown} for {owner}")
+    target_latency = a.get("target_latency", 1.0)
+    if not isinstance(target_latency, (int, float)) or target_latency <= 0:
+        raise ValueError(f"ProviderConfig.adaptive.target_latency must be a number > 0 for {owner}")
+    for key in ("min_concurrency", "min_batch_size", "max_batch_size"):
+        if key in a and (not isinstance(a[key], int) or a[key] < 1):
+            raise ValueError(f"ProviderConfig.adaptive.{key} must be an integer >= 1 for {owner}")
+    if a.get("min_concurrency", 1) > max_concurrency:
+        raise ValueError(f"ProviderConfig.adaptive.min_concurrency must be <= max_concurrency for {owner}")
+    if a.get("min_batch_size", 1) > a.get("max_batch_size", a.get("min_batch_size", 1)):
+        raise ValueError(f"ProviderConfig.adaptive.min_batch_size must be <= max_batch_size for {owner}")
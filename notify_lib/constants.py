@@ -12,6 +12,26 @@ class MessageType(Enum):
     OTP = "otp"
 
 
+class DispatchMode(Enum):
+    FAILOVER = "failover"
+    WEIGHTED = "weighted"
+    LATENCY = "latency"
+
+
 class Provider(Enum):
     TWOFACTOR = "twofactor"
-    SENDGRID = "sendgrid"
\ No newline at end of file
+    SENDGRID = "sendgrid"
+
+
+class ErrorCategory(Enum):
+    TRANSPORT = "transport"
+    SERVER = "server"
+    THROTTLED = "throttled"
+    CLIENT = "client"
+    PROVIDER = "provider"
+    VALIDATION = "validation"
+
+
+# Failures the provider may not repeat; these are worth re-sending elsewhere
+TRANSIENT_ERRORS = frozenset({
+    ErrorCategory.TRANSPORT.value, ErrorCategory.SERVER.value, ErrorCategory.THROTTLED.value})
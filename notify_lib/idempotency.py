@@ -0,0 +1,204 @@
+import hashlib
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+from notify_lib.config import IdempotencyConfig
+
+# SQLite's default limit on bound parameters is 999
+SQLITE_CHUNK = 500
+
+# reserve_many's value for a key reserved by a send that has not settled yet
+IN_FLIGHT = object()
+
+
+def item_key(identifier: str, item) -> str:
+    # Same notification, same recipient and same content; a new OTP is a new message
+    content = (item.message, getattr(item, "subject", None), getattr(item, "otp", None))
+    raw = f"{identifier}\x1f{item.recipient}\x1f{content!r}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class IdempotencyStore(ABC):
+    # Maps item keys to the ext_id of the send that delivered them, for `ttl` seconds. A send
+    # first reserves its keys, so a concurrent send of the same items sees them as in flight;
+    # a reservation lapses after `reservation_ttl` seconds should its send never settle it
+
+    def __init__(self, ttl: float, reservation_ttl: float = 300.0):
+        self.ttl = ttl
+        self.reservation_ttl = reservation_ttl
+
+    @abstractmethod
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Optional[str]]:
+        # ext_ids of the keys already delivered
+        pass
+
+    @abstractmethod
+    def reserve_many(self, keys: Iterable[str]) -> Dict[str, Optional[str]]:
+        # Atomically reserves every key not yet present and returns the others, mapped to their
+        # ext_id or to IN_FLIGHT while another send holds them
+        pass
+
+    @abstractmethod
+    def put_many(self, entries: Dict[str, Optional[str]]):
+        pass
+
+    @abstractmethod
+    def release_many(self, keys: Iterable[str]):
+        # Drops reservations whose send did not deliver, so a retry may send them
+        pass
+
+    def close(self):
+        pass
+
+
+class MemoryIdempotencyStore(IdempotencyStore):
+
+    def __init__(self, ttl: float, max_entries: int = 100000, reservation_ttl: float = 300.0):
+        super().__init__(ttl, reservation_ttl)
+        self.max_entries = max_entries
+        # key -> (ext_id, expires_at, reserved)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _live(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._live(key, now)
+                if entry is not None and not entry[2]:
+                    found[key] = entry[0]
+        return found
+
+    def reserve_many(self, keys):
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._live(key, now)
+                if entry is not None:
+                    found[key] = IN_FLIGHT if entry[2] else entry[0]
+                    continue
+                self._entries[key] = (None, now + self.reservation_ttl, True)
+            self._trim()
+        return found
+
+    def put_many(self, entries):
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            for key, ext_id in entries.items():
+                self._entries[key] = (ext_id, expires_at, False)
+                self._entries.move_to_end(key)
+            self._trim()
+
+    def release_many(self, keys):
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[2]:
+                    del self._entries[key]
+
+    def _trim(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class SqliteIdempotencyStore(IdempotencyStore):
+    # Shared by every process pointing at the same file, so retries landing on another
+    # worker are still suppressed
+
+    def __init__(self, ttl: float, path: str, reservation_ttl: float = 300.0):
+        super().__init__(ttl, reservation_ttl)
+        import sqlite3
+
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS idempotency (key TEXT PRIMARY KEY, ext_id TEXT, expires_at REAL NOT NULL, "
+            "reserved INTEGER NOT NULL DEFAULT 0)")
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(idempotency)")]
+        if "reserved" not in columns:
+            self._conn.execute("ALTER TABLE idempotency ADD COLUMN reserved INTEGER NOT NULL DEFAULT 0")
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        keys = list(keys)
+        now = time.time()
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), SQLITE_CHUNK):
+                chunk = keys[i:i + SQLITE_CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT key, ext_id FROM idempotency WHERE key IN ({','.join('?' * len(chunk))}) "
+                    f"AND expires_at > ? AND reserved = 0", (*chunk, now)).fetchall()
+                found.update(rows)
+        return found
+
+    def reserve_many(self, keys):
+        keys = list(keys)
+        now = time.time()
+        found = {}
+        with self._lock:
+            # One immediate transaction, so two processes cannot both reserve a key
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for i in range(0, len(keys), SQLITE_CHUNK):
+                    chunk = keys[i:i + SQLITE_CHUNK]
+                    placeholders = ",".join("?" * len(chunk))
+                    self._conn.execute(
+                        f"DELETE FROM idempotency WHERE key IN ({placeholders}) AND expires_at <= ?", (*chunk, now))
+                    rows = self._conn.execute(
+                        f"SELECT key, ext_id, reserved FROM idempotency WHERE key IN ({placeholders})",
+                        chunk).fetchall()
+                    found.update((key, IN_FLIGHT if reserved else ext_id) for key, ext_id, reserved in rows)
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO idempotency (key, ext_id, expires_at, reserved) VALUES (?, NULL, ?, 1)",
+                    [(key, now + self.reservation_ttl) for key in keys if key not in found])
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return found
+
+    def put_many(self, entries):
+        if not entries:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO idempotency (key, ext_id, expires_at, reserved) VALUES (?, ?, ?, 0)",
+                [(key, ext_id, now + self.ttl) for key, ext_id in entries.items()])
+            self._conn.execute("DELETE FROM idempotency WHERE expires_at <= ?", (now,))
+            self._conn.execute("COMMIT")
+
+    def release_many(self, keys):
+        keys = list(keys)
+        if not keys:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM idempotency WHERE key = ? AND reserved = 1", [(key,) for key in keys])
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def build_idempotency_store(config: IdempotencyConfig) -> IdempotencyStore:
+    if config.backend == "sqlite":
+        return SqliteIdempotencyStore(config.ttl, config.path, config.reservation_ttl)
+    return MemoryIdempotencyStore(config.ttl, config.max_entries, config.reservation_ttl)
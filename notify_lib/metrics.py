@@ -0,0 +1,146 @@
+import bisect
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Dict, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BATCH_SIZE_BUCKETS = (1, 10, 50, 100, 250, 500, 1000, 5000)
+
+REQUEST_SECONDS = "notify_vendor_request_seconds"
+REQUESTS = "notify_vendor_requests_total"
+BATCH_SIZE = "notify_vendor_batch_size"
+RETRIES = "notify_retries_total"
+ITEMS = "notify_items_total"
+ITEM_ERRORS = "notify_item_errors_total"
+
+HISTOGRAM_BUCKETS = {REQUEST_SECONDS: LATENCY_BUCKETS, BATCH_SIZE: BATCH_SIZE_BUCKETS}
+
+
+class MetricsSink(ABC):
+    # Receives every measurement; subclasses only need increment and observe
+    enabled = True
+
+    @abstractmethod
+    def increment(self, name: str, value: float = 1, **labels):
+        pass
+
+    @abstractmethod
+    def observe(self, name: str, value: float, **labels):
+        pass
+
+    def record_request(self, vendor: str, operation: str, seconds: float, outcome, items: int = 1):
+        # One HTTP call to a provider carrying `items` recipients
+        self.observe(REQUEST_SECONDS, seconds, vendor=vendor, operation=operation)
+        self.observe(BATCH_SIZE, items, vendor=vendor, operation=operation)
+        self.increment(REQUESTS, vendor=vendor, operation=operation, outcome=str(outcome))
+
+    def record_retry(self, vendor: str, items: int):
+        self.increment(RETRIES, items, vendor=vendor)
+
+    def record_items(self, channel: str, items):
+        statuses = Counter(item.delivery_status for item in items)
+        categories = Counter(item.error_category for item in items if item.error_category)
+        for status, count in statuses.items():
+            self.increment(ITEMS, count, channel=channel, status=status)
+        for category, count in categories.items():
+            self.increment(ITEM_ERRORS, count, channel=channel, category=category)
+
+
+class NullMetrics(MetricsSink):
+    enabled = False
+
+    def increment(self, name, value=1, **labels):
+        pass
+
+    def observe(self, name, value, **labels):
+        pass
+
+    def record_request(self, vendor, operation, seconds, outcome, items=1):
+        pass
+
+    def record_retry(self, vendor, items):
+        pass
+
+    def record_items(self, channel, items):
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+
+class InMemoryMetrics(MetricsSink):
+
+    def __init__(self):
+        self.counters: Dict[Tuple, float] = {}
+        # (name, labels) -> [bucket counts..., sum, count]
+        self.histograms: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        buckets = HISTOGRAM_BUCKETS.get(name, LATENCY_BUCKETS)
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            state = self.histograms.get(key)
+            if state is None:
+                state = self.histograms[key] = [0] * (len(buckets) + 1) + [0.0, 0]
+            state[bisect.bisect_left(buckets, value)] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def counter(self, name: str, **labels) -> float:
+        return self.counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def quantile(self, name: str, q: float, **labels) -> float:
+        # Upper bound of the bucket holding the q-th observation
+        buckets = HISTOGRAM_BUCKETS.get(name, LATENCY_BUCKETS)
+        state = self.histograms.get((name, tuple(sorted(labels.items()))))
+        if not state or not state[-1]:
+            return 0.0
+        target = q * state[-1]
+        seen = 0
+        for bound, count in zip(buckets + (float("inf"),), state):
+            seen += count
+            if seen >= target:
+                return bound
+        return float("inf")
+
+    def prometheus_text(self) -> str:
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items())
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{_labels(labels)} {_number(value)}")
+        for (name, labels), state in histograms:
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, count in zip(HISTOGRAM_BUCKETS.get(name, LATENCY_BUCKETS) + (float("inf"),), state):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                lines.append(f"{name}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(state[-2])}")
+            lines.append(f"{name}_count{_labels(labels)} {state[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels) -> str:
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
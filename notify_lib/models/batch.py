@@ -0,0 +1,127 @@
+from typing import Dict, List, Optional, Sequence
+
+
+# Columnar alternative to a list of items: every field is one parallel list and
+# rows are lightweight views, so a campaign costs a few pointers per recipient
+# instead of one object each. Vendors read and write rows exactly like items,
+# and results land directly in the status/ext_id/error columns.
+
+RESULT_FIELDS = ("delivery_status", "ext_id", "error", "error_category")
+
+
+def _column(name: str):
+    def getter(self):
+        column = self._batch.columns[name]
+        return None if column is None else column[self._index]
+
+    def setter(self, value):
+        columns = self._batch.columns
+        if columns[name] is None:
+            columns[name] = [None] * len(self._batch)
+        columns[name][self._index] = value
+
+    return property(getter, setter)
+
+
+class ItemRow:
+    __slots__ = ("_batch", "_index")
+
+    def __init__(self, batch, index: int):
+        self._batch = batch
+        self._index = index
+
+    recipient = _column("recipient")
+    message = _column("message")
+    message_template = _column("message_template")
+    delivery_status = _column("delivery_status")
+    ext_id = _column("ext_id")
+    error = _column("error")
+    error_category = _column("error_category")
+
+
+class SmsItemRow(ItemRow):
+    __slots__ = ()
+
+    otp = _column("otp")
+    template_name = _column("template_name")
+    dlt_data = _column("dlt_data")
+    variables = _column("variables")
+
+
+class EmailItemRow(ItemRow):
+    __slots__ = ()
+
+    subject = _column("subject")
+    variables = _column("variables")
+    cc = _column("cc")
+    bcc = _column("bcc")
+    is_html = _column("is_html")
+
+
+class ItemBatch:
+    row_class = ItemRow
+    fields = ("recipient", "message", "message_template") + RESULT_FIELDS
+
+    def __init__(self, recipients: Sequence[str], messages=None, **columns):
+        size = len(recipients)
+        self._size = size
+        self.columns: Dict[str, Optional[List]] = {name: None for name in self.fields}
+        self.columns["recipient"] = list(recipients)
+        self.columns["message"] = self._values("message", messages)
+        for name, values in columns.items():
+            if name not in self.columns:
+                raise ValueError(f"Unknown column {name} for {self.__class__.__name__}")
+            self.columns[name] = self._values(name, values)
+        self.columns["delivery_status"] = ["PENDING"] * size
+        for name in RESULT_FIELDS[1:]:
+            self.columns[name] = [None] * size
+
+    def _values(self, name: str, values) -> Optional[List]:
+        # A scalar is shared by every row, e.g. one message body for the whole campaign
+        if values is None:
+            return None
+        if isinstance(values, (str, dict)) or not hasattr(values, "__len__"):
+            return [values] * self._size
+        if len(values) != self._size:
+            raise ValueError(f"Column {name} has {len(values)} values, expected {self._size}")
+        return list(values)
+
+    def column(self, name: str) -> Optional[List]:
+        return self.columns[name]
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        row_class = self.row_class
+        for index in range(self._size):
+            yield row_class(self, index)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.row_class(self, i) for i in range(*index.indices(self._size))]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("ItemBatch index out of range")
+        return self.row_class(self, index)
+
+    def append(self, item):
+        for name, column in self.columns.items():
+            value = getattr(item, name, None)
+            if column is None:
+                if value is None:
+                    continue
+                column = self.columns[name] = [None] * self._size
+            column.append(value)
+        self._size += 1
+
+
+class SmsItemBatch(ItemBatch):
+    row_class = SmsItemRow
+    fields = ("recipient", "message", "message_template", "otp", "template_name", "dlt_data", "variables") + RESULT_FIELDS
+
+
+class EmailItemBatch(ItemBatch):
+    row_class = EmailItemRow
+    fields = ("recipient", "message", "message_template", "subject", "variables", "cc", "bcc", "is_html") + RESULT_FIELDS
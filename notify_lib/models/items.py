@@ -2,20 +2,27 @@ from typing import Optional
 
 
 class NotificationItem:
+    __slots__ = ("recipient", "message", "message_template", "delivery_status", "ext_id", "error", "error_category")
 
-    def __init__(self, recipient: str, message: str):
+    def __init__(self, recipient: str, message: Optional[str], message_template: Optional[str] = None):
         self.recipient = recipient
         self.message = message
+        # Template ID or text rendered with `variables` into `message` when the item is sent
+        self.message_template = message_template
         self.delivery_status = "PENDING"
         self.ext_id = None
         self.error = None
+        self.error_category = None
 
 
 class SmsItem(NotificationItem):
+    __slots__ = ("otp", "template_name", "dlt_data", "variables")
+
     def __init__(
-            self, phone_number: str, message: str, otp: Optional[str] = None,
-            template_name: Optional[str] = None, dlt_data: Optional[dict] = None, variables: Optional[dict] = None,):
-        super().__init__(phone_number, message)
+            self, phone_number: str, message: Optional[str] = None, otp: Optional[str] = None,
+            template_name: Optional[str] = None, dlt_data: Optional[dict] = None, variables: Optional[dict] = None,
+            message_template: Optional[str] = None):
+        super().__init__(phone_number, message, message_template)
         self.otp = otp
         self.template_name = template_name
         self.dlt_data = dlt_data
@@ -23,12 +30,16 @@ class SmsItem(NotificationItem):
 
 
 class EmailItem(NotificationItem):
+    __slots__ = ("subject", "variables", "cc", "bcc", "is_html")
+
     def __init__(
-            self, to_email: str, message: str,
+            self, to_email: str, message: Optional[str] = None,
             subject: Optional[str] = None, variables: Optional[dict] = None,
-            cc: Optional[list] = None, bcc: Optional[list] = None):
-        super().__init__(to_email, message)
+            cc: Optional[list] = None, bcc: Optional[list] = None, is_html: Optional[bool] = None,
+            message_template: Optional[str] = None):
+        super().__init__(to_email, message, message_template)
         self.subject = subject
         self.variables = variables
         self.cc = cc
-        self.bcc = bcc
\ No newline at end of file
+        self.bcc = bcc
+        self.is_html = is_html
@@ -1,3 +1,4 @@
+import copy
 import uuid
 from typing import Optional, List
 
@@ -6,21 +7,30 @@ from notify_lib.constants import MessageType
 
 class Notification:
 
-    def __init__(self, identifier: Optional[str] = None):
+    def __init__(self, identifier: Optional[str] = None, deadline: Optional[float] = None):
         self.identifier: str = identifier or str(uuid.uuid4())
         self.items: List = []
+        # Unix timestamp after which no further retries or failovers are attempted
+        self.deadline = deadline
 
     def add_item(self, item):
         self.items.append(item)
         return self
 
+    def with_items(self, items):
+        # Shallow copy sharing every attribute except the item list
+        clone = copy.copy(self)
+        clone.items = list(items)
+        return clone
+
 
 class SmsNotification(Notification):
 
     def __init__(
             self, identifier: Optional[str] = None,
-            message_type: MessageType = MessageType.TRANSACTIONAL.value, sender_id: Optional[str] = None):
-        super().__init__(identifier)
+            message_type: MessageType = MessageType.TRANSACTIONAL.value, sender_id: Optional[str] = None,
+            deadline: Optional[float] = None):
+        super().__init__(identifier, deadline)
         self.message_type = message_type
         self.sender_id = sender_id
 
@@ -29,6 +39,6 @@ class EmailNotification(Notification):
 
     def __init__(
             self, identifier: Optional[str] = None,
-            from_email: Optional[str] = None):
-        super().__init__(identifier)
+            from_email: Optional[str] = None, deadline: Optional[float] = None):
+        super().__init__(identifier, deadline)
         self.from_email = from_email
\ No newline at end of file
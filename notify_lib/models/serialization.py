@@ -0,0 +1,52 @@
+from typing import Any, Dict
+
+from notify_lib.models.items import EmailItem, SmsItem
+from notify_lib.models.notifications import EmailNotification, SmsNotification
+
+# Notification and item classes a payload may name, by kind
+KINDS = {
+    "sms": (SmsNotification, SmsItem),
+    "email": (EmailNotification, EmailItem),
+}
+
+
+def _item_fields(item_class) -> tuple:
+    return tuple(name for cls in reversed(item_class.__mro__) for name in getattr(cls, "__slots__", ()))
+
+
+ITEM_FIELDS = {kind: _item_fields(item_class) for kind, (_, item_class) in KINDS.items()}
+
+
+def notification_to_dict(notification) -> Dict[str, Any]:
+    # Plain data only, so the result round-trips through JSON. Items may be objects or
+    # ItemBatch rows; None fields are left out
+    for kind, (notification_class, _) in KINDS.items():
+        if isinstance(notification, notification_class):
+            break
+    else:
+        raise ValueError(f"Cannot serialize {type(notification).__name__}: expected an SMS or email notification")
+    fields = {name: value for name, value in vars(notification).items() if name != "items"}
+    items = []
+    for item in notification.items:
+        values = {}
+        for name in ITEM_FIELDS[kind]:
+            value = getattr(item, name, None)
+            if value is not None:
+                values[name] = value
+        items.append(values)
+    return {"kind": kind, "fields": fields, "items": items}
+
+
+def notification_from_dict(data: Dict[str, Any]):
+    notification_class, item_class = KINDS[data["kind"]]
+    notification = notification_class.__new__(notification_class)
+    notification.__dict__.update(data["fields"])
+    fields = ITEM_FIELDS[data["kind"]]
+    items = []
+    for values in data["items"]:
+        item = item_class.__new__(item_class)
+        for name in fields:
+            setattr(item, name, values.get(name))
+        items.append(item)
+    notification.items = items
+    return notification
@@ -0,0 +1,258 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Optional
+
+from notify_lib.config import OutboxConfig
+from notify_lib.models.serialization import notification_from_dict, notification_to_dict
+
+PENDING = "PENDING"
+PROCESSING = "PROCESSING"
+DONE = "DONE"
+FAILED = "FAILED"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel TEXT NOT NULL,
+    identifier TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    item_count INTEGER NOT NULL DEFAULT 1,
+    available_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    error TEXT,
+    owner TEXT,
+    lease_until REAL
+);
+CREATE INDEX IF NOT EXISTS outbox_ready ON outbox (status, available_at);
+"""
+
+# Most rows one claim may take; their items are also capped by the channel's batch size
+CLAIM_ROWS = 500
+
+
+class Outbox:
+    # Notifications are stored as JSON in a SQLite table in WAL mode and drained by a pool
+    # of worker threads. The index on (status, available_at) is the timer: scheduled
+    # rows simply carry a future available_at, and each claim takes the earliest due
+    # rows of one channel, up to that channel's batch size in items, so work due at the
+    # same time is released together. Claimed rows are flipped to PROCESSING inside an
+    # immediate transaction under this outbox's owner id with a lease of `lease_timeout`,
+    # and once sent the payload is replaced by the notification carrying the final item
+    # statuses. Rows whose lease ran out, because their process died or stalled, are made
+    # PENDING again by the next claim of any process, so they are re-sent rather than lost.
+
+    def __init__(self, config: OutboxConfig):
+        self.config = config
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.handlers: Dict[str, Callable] = {}
+        self.batch_items: Dict[str, int] = {}
+        self._conn = sqlite3.connect(config.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(outbox)")]
+        if "item_count" not in columns:
+            self._conn.execute("ALTER TABLE outbox ADD COLUMN item_count INTEGER NOT NULL DEFAULT 1")
+        for column, kind in (("owner", "TEXT"), ("lease_until", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE outbox ADD COLUMN {column} {kind}")
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._workers = []
+
+    def _execute(self, sql: str, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def register(self, channel: str, handler: Callable, batch_items: int = 1000):
+        # `handler` sends a list of due notifications and returns, for each, the notification or the
+        # exception that stopped it; workers only claim rows of registered channels
+        self.handlers[channel] = handler
+        self.batch_items[channel] = batch_items
+        self.start()
+        self._wakeup.set()
+
+    def unregister(self, channel: str, handler: Callable):
+        # Only while `handler` is still the channel's, so a replacement registered since stays
+        if self.handlers.get(channel) == handler:
+            del self.handlers[channel]
+
+    def start(self):
+        with self._lock:
+            if self._workers:
+                return
+            self._stopping.clear()
+            for index in range(self.config.workers):
+                worker = threading.Thread(target=self._run, name=f"notify-outbox-{index}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def close(self, timeout: Optional[float] = None):
+        self._stopping.set()
+        self._wakeup.set()
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+
+    def put(self, channel: str, notification, available_at: Optional[float] = None) -> int:
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO outbox (channel, identifier, payload, status, item_count, available_at, created_at, "
+                "updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (channel, notification.identifier, _dumps(notification),
+                 PENDING, len(notification.items), available_at or now, now, now))
+            row_id = cursor.lastrowid
+        self._wakeup.set()
+        return row_id
+
+    def get(self, row_id: int) -> Optional[dict]:
+        rows = self._execute(
+            "SELECT channel, status, attempts, error, payload FROM outbox WHERE id = ?", (row_id,))
+        if not rows:
+            return None
+        channel, status, attempts, error, payload = rows[0]
+        return {
+            "id": row_id,
+            "channel": channel,
+            "status": status,
+            "attempts": attempts,
+            "error": error,
+            "notification": _loads(payload),
+        }
+
+    def pending_count(self) -> int:
+        return self._execute("SELECT COUNT(*) FROM outbox WHERE status IN (?, ?)", (PENDING, PROCESSING))[0][0]
+
+    def _claim(self):
+        channels = list(self.handlers)
+        if not channels:
+            return None, []
+        placeholders = ",".join("?" * len(channels))
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "UPDATE outbox SET status = ?, owner = NULL, updated_at = ? WHERE status = ? "
+                    "AND (lease_until IS NULL OR lease_until < ?)", (PENDING, now, PROCESSING, now))
+                first = self._conn.execute(
+                    f"SELECT channel FROM outbox WHERE status = ? AND available_at <= ? "
+                    f"AND channel IN ({placeholders}) ORDER BY available_at, id LIMIT 1",
+                    (PENDING, now, *channels)).fetchone()
+                rows = []
+                if first is not None:
+                    channel = first[0]
+                    candidates = self._conn.execute(
+                        "SELECT id, payload, attempts, item_count FROM outbox WHERE status = ? AND available_at <= ? "
+                        "AND channel = ? ORDER BY available_at, id LIMIT ?",
+                        (PENDING, now, channel, CLAIM_ROWS)).fetchall()
+                    items = 0
+                    for row in candidates:
+                        if rows and items + row[3] > self.batch_items[channel]:
+                            break
+                        rows.append(row)
+                        items += row[3]
+                    lease_until = now + self.config.lease_timeout
+                    self._conn.executemany(
+                        "UPDATE outbox SET status = ?, attempts = attempts + 1, owner = ?, lease_until = ?, "
+                        "updated_at = ? WHERE id = ?",
+                        [(PROCESSING, self.owner, lease_until, now, row[0]) for row in rows])
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return (first[0] if first else None), rows
+
+    def _run(self):
+        while not self._stopping.is_set():
+            channel, rows = self._claim()
+            if not rows:
+                self._wakeup.wait(self.config.poll_interval)
+                self._wakeup.clear()
+                continue
+            notifications = []
+            for row in list(rows):
+                try:
+                    notifications.append(_loads(row[1]))
+                except (ValueError, KeyError, TypeError) as e:
+                    rows.remove(row)
+                    self._settle(row[0], FAILED, None, f"Unreadable payload: {e}")
+            if not rows:
+                continue
+            handler = self.handlers.get(channel)
+            if handler is None:
+                # Unregistered since the claim; the rows wait for the channel's next handler
+                for row in rows:
+                    self._settle(row[0], PENDING, None, None)
+                continue
+            try:
+                # The handler reports each notification as handled or by the exception that stopped it
+                results = handler(notifications)
+            except Exception as e:
+                results = [e] * len(rows)
+            done = []
+            for row, result in zip(rows, results):
+                if isinstance(result, Exception):
+                    self._release(row[0], row[2] + 1, str(result) or result.__class__.__name__)
+                else:
+                    done.append((row, result))
+            if not done:
+                continue
+            now = time.time()
+            with self._lock:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    "UPDATE outbox SET status = ?, payload = ?, error = NULL, owner = NULL, updated_at = ? "
+                    "WHERE id = ? AND owner = ?",
+                    [(DONE, _dumps(notification), now, row[0], self.owner) for row, notification in done])
+                self._conn.execute("COMMIT")
+
+    def _release(self, row_id: int, attempts: int, error: str):
+        if attempts >= self.config.max_attempts:
+            self._settle(row_id, FAILED, None, error)
+            return
+        self._settle(row_id, PENDING, time.time() + self.config.retry_delay * attempts, error)
+
+    def _settle(self, row_id: int, status: str, available_at: Optional[float], error: str):
+        # Only while this outbox still owns the row: past its lease another process may have claimed it
+        now = time.time()
+        self._execute(
+            "UPDATE outbox SET status = ?, error = ?, available_at = COALESCE(?, available_at), owner = NULL, "
+            "updated_at = ? WHERE id = ? AND owner = ?", (status, error, available_at, now, row_id, self.owner))
+
+
+def _dumps(notification) -> str:
+    try:
+        return json.dumps(notification_to_dict(notification), separators=(",", ":"))
+    except TypeError as e:
+        raise ValueError(f"Notification cannot be stored in the outbox: {e}") from e
+
+
+def _loads(payload):
+    if isinstance(payload, bytes):
+        payload = payload.decode("utf-8")
+    return notification_from_dict(json.loads(payload))
+
+
+_outboxes: Dict[str, Outbox] = {}
+_outboxes_lock = threading.Lock()
+
+
+def shared_outbox(config: OutboxConfig) -> Outbox:
+    # Every service of the process writing to the same file shares one outbox and worker pool
+    with _outboxes_lock:
+        outbox = _outboxes.get(config.path)
+        if outbox is None:
+            outbox = Outbox(config)
+            _outboxes[config.path] = outbox
+        return outbox
@@ -0,0 +1,41 @@
+import functools
+import re
+from typing import Iterable, List, Optional
+
+DEFAULT_COUNTRY_CODE = "91"
+NATIONAL_NUMBER_LENGTH = 10
+CACHE_SIZE = 100000
+
+SEPARATOR_PATTERN = re.compile(r'[\s\-().]')
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def normalize_phone(raw: str, country_code: str = DEFAULT_COUNTRY_CODE) -> Optional[str]:
+    # Returns the E.164 form ("+919876543210") or None when the input is not a phone number
+    if not raw:
+        return None
+    cleaned = SEPARATOR_PATTERN.sub("", raw)
+    if cleaned.startswith("+"):
+        digits = cleaned[1:]
+    elif cleaned.startswith("00"):
+        digits = cleaned[2:]
+    else:
+        # Without an international prefix only a national number, alone or after the country code, is accepted
+        national = cleaned.lstrip("0")
+        if len(national) == NATIONAL_NUMBER_LENGTH:
+            digits = country_code + national
+        elif len(national) == len(country_code) + NATIONAL_NUMBER_LENGTH and national.startswith(country_code):
+            digits = national
+        else:
+            return None
+    if not digits.isdigit() or not 8 <= len(digits) <= 15:
+        return None
+    return "+" + digits
+
+
+def normalize_phones(numbers: Iterable[str], country_code: str = DEFAULT_COUNTRY_CODE) -> List[Optional[str]]:
+    return [normalize_phone(number, country_code) for number in numbers]
+
+
+def cache_info():
+    return normalize_phone.cache_info()
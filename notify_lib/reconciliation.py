@@ -0,0 +1,131 @@
+import threading
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Iterable, List, Optional
+
+from notify_lib.constants import ErrorCategory
+
+# Final states a delivery report can move a SENT item to
+DELIVERED = "DELIVERED"
+UNDELIVERED = "UNDELIVERED"
+
+
+class DeliveryReport:
+    # One provider report: `recipient` tells apart items sharing an ext_id, such as every
+    # recipient of one SendGrid request
+    __slots__ = ("ext_id", "recipient", "status", "error")
+
+    def __init__(self, ext_id: str, status: str, recipient: Optional[str] = None, error: Optional[str] = None):
+        self.ext_id = ext_id
+        self.status = status
+        self.recipient = recipient
+        self.error = error
+
+
+class DeliveryIndex:
+    # Sent items awaiting a final report, per vendor and ext_id. An ext_id shared by several
+    # items maps to a dict keyed by normalized recipient, so applying a report is at most two
+    # dict lookups. Items leave once a final report arrives, or oldest first across all vendors
+    # beyond `max_entries`. Polling walks each vendor's ext_ids round robin through a separate
+    # queue, so it never reorders the entries themselves
+
+    def __init__(self, max_entries: int = 1000000, recipient_key: Callable = str.lower):
+        self.max_entries = max_entries
+        self.recipient_key = recipient_key
+        self._vendors: Dict[str, dict] = {}
+        # (vendor, ext_id) in insertion order, for eviction
+        self._order = OrderedDict()
+        # Per vendor ext_ids in polling order; settled ones are dropped when reached
+        self._poll: Dict[str, deque] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    def track(self, vendor: str, items: Iterable):
+        with self._lock:
+            entries = self._vendors.setdefault(vendor, {})
+            for item in items:
+                if item.delivery_status != "SENT" or not item.ext_id:
+                    continue
+                current = entries.get(item.ext_id)
+                if current is None:
+                    entries[item.ext_id] = item
+                    self._order[(vendor, item.ext_id)] = None
+                    self._poll.setdefault(vendor, deque()).append(item.ext_id)
+                elif isinstance(current, dict):
+                    key = self.recipient_key(item.recipient)
+                    replaced = current.get(key)
+                    current[key] = item
+                    if replaced is not None:
+                        continue
+                elif current is not item:
+                    entries[item.ext_id] = {
+                        self.recipient_key(current.recipient): current, self.recipient_key(item.recipient): item}
+                else:
+                    continue
+                self._size += 1
+            while self._size > self.max_entries and self._order:
+                evicted_vendor, ext_id = self._order.popitem(last=False)[0]
+                evicted = self._vendors[evicted_vendor].pop(ext_id)
+                self._size -= len(evicted) if isinstance(evicted, dict) else 1
+
+    def pending(self, vendor: str, limit: int) -> List[str]:
+        # Up to `limit` ext_ids of `vendor` held by a single item, oldest first on the first pass;
+        # each poll resumes where the previous one stopped, so every ext_id is polled before any
+        # is polled again
+        with self._lock:
+            entries = self._vendors.get(vendor)
+            queue = self._poll.get(vendor)
+            if not entries or not queue:
+                return []
+            ext_ids = []
+            for _ in range(len(queue)):
+                if len(ext_ids) >= limit:
+                    break
+                ext_id = queue.popleft()
+                # Settled, or shared by several items: a polled report names no recipient, so
+                # those settle only through webhook reports
+                if isinstance(entries.get(ext_id, {}), dict):
+                    continue
+                queue.append(ext_id)
+                ext_ids.append(ext_id)
+            return ext_ids
+
+    def apply(self, vendor: str, reports: Iterable[DeliveryReport]) -> List:
+        # Moves each matched item to its reported state and returns the items updated
+        updated = []
+        with self._lock:
+            entries = self._vendors.get(vendor)
+            if not entries:
+                return updated
+            for report in reports:
+                current = entries.get(report.ext_id)
+                if current is None:
+                    continue
+                if isinstance(current, dict):
+                    if report.recipient is None:
+                        continue
+                    item = current.pop(self.recipient_key(report.recipient), None)
+                    if item is None:
+                        continue
+                    if not current:
+                        self._remove(vendor, entries, report.ext_id)
+                else:
+                    # A report naming another recipient, such as a cc bounce, does not settle this item
+                    if report.recipient is not None and (
+                            self.recipient_key(report.recipient) != self.recipient_key(current.recipient)):
+                        continue
+                    item = current
+                    self._remove(vendor, entries, report.ext_id)
+                self._size -= 1
+                item.delivery_status = report.status
+                if report.status == UNDELIVERED:
+                    item.error = report.error or "Not delivered"
+                    item.error_category = ErrorCategory.PROVIDER.value
+                updated.append(item)
+        return updated
+
+    def _remove(self, vendor: str, entries: dict, ext_id: str):
+        del entries[ext_id]
+        del self._order[(vendor, ext_id)]
@@ -1,7 +1,83 @@
+import asyncio
+import functools
+import inspect
+import itertools
+import threading
+import time
 from abc import ABC, abstractmethod
+from typing import AsyncIterator, Iterable, Iterator, List, Optional
+
+from notify_lib.constants import DispatchMode, ErrorCategory, TRANSIENT_ERRORS
+from notify_lib.idempotency import IN_FLIGHT, item_key
+from notify_lib.metrics import NULL_METRICS, MetricsSink
+from notify_lib.services.circuit_breaker import CircuitBreaker
+from notify_lib.services.retry import RetryPolicy
+from notify_lib.templates import TEMPLATES, TemplateCache
+from notify_lib.vendors.vendor_factory import account_names
+
+
+# Weight of the newest sample in each vendor's moving average of seconds per item
+LATENCY_SMOOTHING = 0.2
+
+# Set on the threads of a service's shared pool, so work running there does not wait on the pool
+_pool_thread = threading.local()
+
+
+def _tracked(method):
+    # Counts the call as in flight, so a retired service closes its resources only once idle
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def tracked_async(self, *args, **kwargs):
+            self._enter()
+            try:
+                return await method(self, *args, **kwargs)
+            finally:
+                self._exit()
+
+        return tracked_async
+
+    @functools.wraps(method)
+    def tracked(self, *args, **kwargs):
+        self._enter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self._exit()
+
+    return tracked
 
 
 class NotificationService(ABC):
+    channel: str = None
+
+    def __init__(
+            self, vendors, dispatch: str = DispatchMode.FAILOVER.value, outbox=None, idempotency=None,
+            metrics: MetricsSink = NULL_METRICS, send_workers: int = 8, templates: Optional[TemplateCache] = None,
+            deliveries=None, poll_batch_size: int = 500):
+        self.vendors = vendors
+        self.send_workers = send_workers
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self.vendor = vendors[0]
+        # Each vendor's account name, which stays the same across a reload (see account_names)
+        self.accounts = dict(zip(vendors, account_names(_vendor_name(vendor) for vendor in vendors)))
+        self.dispatch = dispatch
+        self.metrics = metrics
+        for vendor in vendors:
+            vendor.metrics = metrics
+        self.breakers = {vendor: self._build_breaker(vendor) for vendor in vendors}
+        self.retry_policies = {vendor: self._build_retry_policy(vendor) for vendor in vendors}
+        self.latencies = {}
+        self._latency_lock = threading.Lock()
+        self.outbox = outbox
+        self.idempotency = idempotency
+        self.templates = templates or TEMPLATES
+        # DeliveryIndex of sent items awaiting a delivery report, when reconciliation is configured
+        self.deliveries = deliveries
+        self.poll_batch_size = poll_batch_size
+        self._in_flight = 0
+        self._idle = threading.Condition()
+
     @abstractmethod
     def send(self, notification):
         pass
@@ -18,35 +94,366 @@ class NotificationService(ABC):
     def get_notification_class(self):
         pass
 
+    def item_error(self, notification, item) -> Optional[str]:
+        return None
+
+    def validate_items(self, notification):
+        # One pass over the items: templated messages are rendered, invalid ones are marked
+        # REJECTED and the rest go on
+        valid = []
+        render = None
+        for item in notification.items:
+            reason = None
+            if getattr(item, "message_template", None) is not None:
+                if render is None:
+                    render = self.templates.renderer()
+                reason = render(item)
+            if reason is None:
+                reason = self.item_error(notification, item)
+            if reason is None:
+                valid.append(item)
+            else:
+                self._reject((item,), reason)
+        if len(valid) == len(notification.items):
+            return notification
+        return notification.with_items(valid)
+
+    def render_templates(self, notification):
+        # send / async_send skip validate_items, so templated items `process` did not render are
+        # rendered on the way out; those that fail are REJECTED rather than sent without a message
+        render = None
+        failed = set()
+        for item in notification.items:
+            if item.message is not None or getattr(item, "message_template", None) is None:
+                continue
+            if render is None:
+                render = self.templates.renderer()
+            reason = render(item)
+            if reason is not None:
+                self._reject((item,), reason)
+                failed.add(id(item))
+        if not failed:
+            return notification
+        return notification.with_items([item for item in notification.items if id(item) not in failed])
+
+    @staticmethod
+    def _reject(items, reason: str):
+        for item in items:
+            item.delivery_status = "REJECTED"
+            item.error = reason
+            item.error_category = ErrorCategory.VALIDATION.value
+
+    def suppress_duplicates(self, notification):
+        # Reserves the items' keys before the send. Items already delivered for this identifier
+        # within the TTL get their original ext_id back instead of a second send; items another
+        # send is delivering right now are rejected rather than sent twice. Returns the batch to
+        # send and, per reserved key, its items: repeats of one item in this notification are
+        # sent once and share the result (see remember_sent)
+        if self.idempotency is None:
+            return notification, None
+        keys = {}
+        for item in notification.items:
+            keys.setdefault(item_key(notification.identifier, item), []).append(item)
+        seen = self.idempotency.reserve_many(list(keys))
+        if not seen and len(keys) == len(notification.items):
+            return notification, keys
+        for key, value in seen.items():
+            items = keys.pop(key)
+            if value is IN_FLIGHT:
+                self._reject(items, "Duplicate of a send in progress")
+                continue
+            for item in items:
+                item.delivery_status = "SENT"
+                item.ext_id = value
+        return notification.with_items([items[0] for items in keys.values()]), keys
+
+    def remember_sent(self, keys):
+        # Settles the reservations: delivered keys are kept, the rest released for a later retry
+        if self.idempotency is None or not keys:
+            return
+        delivered, released = {}, []
+        for key, items in keys.items():
+            sent = items[0]
+            for item in items[1:]:
+                item.delivery_status = sent.delivery_status
+                item.ext_id = sent.ext_id
+                item.error = sent.error
+                item.error_category = sent.error_category
+            if sent.delivery_status == "SENT":
+                delivered[key] = sent.ext_id
+            else:
+                released.append(key)
+        self.idempotency.put_many(delivered)
+        self.idempotency.release_many(released)
+
+    @_tracked
     def process(self, notification):
         self.prepare(notification)
 
         if not self.safety_check(notification):
             return False
 
-        result = self.send(notification)
+        batch, keys = self.suppress_duplicates(self.validate_items(notification))
+        try:
+            if batch.items:
+                self.send(batch)
+        finally:
+            self.remember_sent(keys)
 
-        self.post_process(notification, result)
+        self.post_process(notification, notification)
 
-        return result
+        return notification
 
+    @_tracked
     async def async_process(self, notification):
         self.prepare(notification)
 
         if not self.safety_check(notification):
             return False
 
-        result = await self.async_send(notification)
+        batch, keys = self.suppress_duplicates(self.validate_items(notification))
+        try:
+            if batch.items:
+                await self.async_send(batch)
+        finally:
+            self.remember_sent(keys)
+
+        self.post_process(notification, notification)
+
+        return notification
+
+    @_tracked
+    def process_due(self, notifications):
+        # Notifications released together by the outbox that differ only in identifier and
+        # items are merged into one send, so many small scheduled sends cost a few vendor batches.
+        # Returns, per notification, the notification once handled or the exception that stopped
+        # it, so a failing group does not get the groups already sent sent again
+        results = list(notifications)
+        groups = {}
+        for index, notification in enumerate(notifications):
+            try:
+                self.prepare(notification)
+                if not self.safety_check(notification):
+                    self._reject(notification.items, "Notification failed the safety check")
+                    continue
+                batch, keys = self.suppress_duplicates(self.validate_items(notification))
+            except Exception as e:
+                results[index] = e
+                continue
+            groups.setdefault(_shared_fields(notification), []).append((index, notification, batch, keys))
+        for members in groups.values():
+            merged = members[0][2].with_items([item for _, _, batch, _ in members for item in batch.items])
+            try:
+                if merged.items:
+                    self.send(merged)
+            except Exception as e:
+                for index, _, _, _ in members:
+                    results[index] = e
+                continue
+            finally:
+                for _, _, _, keys in members:
+                    self.remember_sent(keys)
+            for _, notification, _, _ in members:
+                self.post_process(notification, notification)
+        return results
+
+    def enqueue(self, notification) -> int:
+        # Persists the notification and returns at once; outbox workers send it
+        return self.schedule(notification, None)
+
+    def schedule(self, notification, send_at) -> int:
+        # `send_at` is a unix timestamp or an aware datetime; the outbox releases it once due
+        if self.outbox is None:
+            raise ValueError("No outbox configured: set NotifyConfig.outbox to enqueue or schedule notifications")
+        if send_at is not None and hasattr(send_at, "timestamp"):
+            if send_at.utcoffset() is None:
+                # A naive datetime would be read in the host's local time zone
+                raise ValueError("send_at must be a unix timestamp or a timezone-aware datetime")
+            send_at = send_at.timestamp()
+        return self.outbox.put(self.channel, notification, available_at=send_at)
+
+    def send_many(self, notifications: Iterable, return_exceptions: bool = False) -> List:
+        # Runs `process` for each notification on the service's shared pool of `send_workers`
+        # threads and returns the results in input order
+        executor = self.executor()
+        futures = [executor.submit(self.process, notification) for notification in notifications]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                results.append(e)
+        return results
+
+    def executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.send_workers, thread_name_prefix=f"notify-{self.channel}",
+                    initializer=self._mark_pool_thread)
+            return self._executor
+
+    def _mark_pool_thread(self):
+        _pool_thread.service = self
+
+    def close(self):
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        for vendor in self.vendors:
+            if hasattr(vendor, "close"):
+                vendor.close()
+
+    def ingest_reports(self, payload, provider: Optional[str] = None) -> List:
+        # A delivery-report webhook body from `provider`, an account name such as "twofactor#2"
+        # (default: the first vendor); returns the items whose status it settled
+        vendor = self._vendor_named(provider)
+        return self._reconciler().apply(self.accounts[vendor], vendor.delivery_reports(payload))
+
+    @_tracked
+    def poll_deliveries(self) -> List:
+        # Asks every vendor with a report endpoint about its oldest unsettled sends, a batch each
+        deliveries = self._reconciler()
+        updated = []
+        for vendor in self.vendors:
+            if not hasattr(vendor, "fetch_delivery_reports"):
+                continue
+            account = self.accounts[vendor]
+            ext_ids = deliveries.pending(account, self.poll_batch_size)
+            if ext_ids:
+                updated.extend(deliveries.apply(account, vendor.fetch_delivery_reports(ext_ids)))
+        return updated
+
+    @_tracked
+    async def async_poll_deliveries(self) -> List:
+        deliveries = self._reconciler()
+        updated = []
+        for vendor in self.vendors:
+            if not hasattr(vendor, "async_fetch_delivery_reports"):
+                continue
+            account = self.accounts[vendor]
+            ext_ids = deliveries.pending(account, self.poll_batch_size)
+            if ext_ids:
+                updated.extend(deliveries.apply(account, await vendor.async_fetch_delivery_reports(ext_ids)))
+        return updated
+
+    def _reconciler(self):
+        if self.deliveries is None:
+            raise ValueError("No reconciliation configured: set NotifyConfig.reconciliation to track deliveries")
+        return self.deliveries
+
+    def _vendor_named(self, provider: Optional[str]):
+        if provider is None:
+            return self.vendor
+        for vendor, account in self.accounts.items():
+            if account == provider:
+                return vendor
+        raise ValueError(f"No vendor named {provider!r} configured for channel {self.channel}")
+
+    def attach_outbox(self):
+        # Points the outbox workers for this channel at this service, which also drains whatever
+        # the channel left in the outbox before a restart. A reload attaches the replacement only
+        # once it is swapped in
+        if self.outbox is not None:
+            self.outbox.register(self.channel, self.process_due, self.stream_chunk_size())
 
-        self.post_process(notification, result)
+    def retire(self, replacement=None):
+        # Called once a reload has swapped in `replacement` (None when the channel was removed).
+        # Sends already running or queued on this service finish, then a background thread
+        # closes the pools and stores the replacement did not adopt
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if self.outbox is not None and (replacement is None or replacement.outbox is not self.outbox):
+            self.outbox.unregister(self.channel, self.process_due)
+        closer = threading.Thread(
+            target=self._close_unadopted, args=(executor, replacement), name=f"notify-{self.channel}-retire",
+            daemon=True)
+        closer.start()
+        return closer
 
-        return result
+    def _close_unadopted(self, executor, replacement):
+        if executor is not None:
+            executor.shutdown(wait=True)
+        with self._idle:
+            self._idle.wait_for(lambda: not self._in_flight)
+        adopted = set()
+        for vendor in replacement.vendors if replacement is not None else ():
+            adopted.update(id(resource) for resource in _vendor_resources(vendor))
+        for vendor in self.vendors:
+            for resource in _vendor_resources(vendor):
+                if id(resource) not in adopted:
+                    resource.close()
+        if self.idempotency is not None and (replacement is None or replacement.idempotency is not self.idempotency):
+            self.idempotency.close()
+
+    def _enter(self):
+        with self._idle:
+            self._in_flight += 1
+
+    def _exit(self):
+        with self._idle:
+            self._in_flight -= 1
+            if not self._in_flight:
+                self._idle.notify_all()
+
+    def adopt_state(self, previous):
+        # Circuit breakers and latency estimates follow each provider account across a reload
+        by_account = {account: vendor for vendor, account in previous.accounts.items()}
+        for vendor in self.vendors:
+            old = by_account.get(self.accounts[vendor])
+            if old is None:
+                continue
+            breaker = previous.breakers[old]
+            breaker.failure_threshold = self.breakers[vendor].failure_threshold
+            breaker.recovery_timeout = self.breakers[vendor].recovery_timeout
+            self.breakers[vendor] = breaker
+            if old in previous.latencies:
+                self.latencies[vendor] = previous.latencies[old]
+
+    def send_stream(self, notification, items: Iterable, chunk_size: Optional[int] = None) -> Iterator:
+        # `notification` only carries the shared fields; items are pulled lazily
+        # and each chunk is released once its results have been yielded
+        chunk_size = chunk_size or self.stream_chunk_size()
+        iterator = iter(items)
+        while True:
+            chunk = list(itertools.islice(iterator, chunk_size))
+            if not chunk:
+                return
+            batch = notification.with_items(chunk)
+            if self.process(batch) is False:
+                self._reject(batch.items, "Notification failed the safety check")
+            yield from batch.items
+
+    async def async_send_stream(self, notification, items, chunk_size: Optional[int] = None) -> AsyncIterator:
+        chunk_size = chunk_size or self.stream_chunk_size()
+        async for chunk in _async_chunks(items, chunk_size):
+            batch = notification.with_items(chunk)
+            if await self.async_process(batch) is False:
+                self._reject(batch.items, "Notification failed the safety check")
+            for item in batch.items:
+                yield item
+
+    def stream_chunk_size(self) -> int:
+        return getattr(self.vendor, "batch_size", None) or 1000
+
+    def vendor_setpoints(self) -> dict:
+        # Current adaptive batch size and concurrency of each vendor that tunes them
+        return {
+            vendor.provider_config.name: vendor.adaptive.setpoints()
+            for vendor in self.vendors if getattr(vendor, "adaptive", None) is not None}
 
     def prepare(self, notification):
         pass
 
     def post_process(self, notification, result):
+        self.metrics.record_items(self.channel, notification.items)
         success_count = sum(1 for item in notification.items if getattr(item, 'delivery_status', '') == 'SENT')
+        rejected_count = sum(1 for item in notification.items if getattr(item, 'delivery_status', '') == 'REJECTED')
         failure_count = len(notification.items) - success_count
 
         status = 'SUCCESS' if success_count == len(notification.items) else 'PARTIAL_FAILURE'
@@ -54,5 +461,249 @@ class NotificationService(ABC):
         return {
             'status': status,
             'success_count': success_count,
-            'failure_count': failure_count
+            'failure_count': failure_count,
+            'rejected_count': rejected_count
         }
+
+    async def aclose(self):
+        for vendor in self.vendors:
+            if hasattr(vendor, "aclose"):
+                await vendor.aclose()
+
+    def eligible_vendors(self, notification):
+        return self.vendors
+
+    def _build_breaker(self, vendor) -> CircuitBreaker:
+        provider_config = getattr(vendor, "provider_config", None)
+        if provider_config is None:
+            return CircuitBreaker()
+        return CircuitBreaker(provider_config.failure_threshold, provider_config.recovery_timeout)
+
+    def _build_retry_policy(self, vendor) -> RetryPolicy:
+        provider_config = getattr(vendor, "provider_config", None)
+        if provider_config is None:
+            return RetryPolicy(metrics=self.metrics, vendor_name=vendor.__class__.__name__)
+        return RetryPolicy(
+            provider_config.max_retries, provider_config.retry_backoff, provider_config.retry_backoff_max,
+            metrics=self.metrics, vendor_name=provider_config.name)
+
+    def _expired(self, notification) -> bool:
+        deadline = getattr(notification, "deadline", None)
+        return deadline is not None and time.time() >= deadline
+
+    def _failover_batch(self, notification, pending):
+        if pending is notification.items:
+            return notification
+        for item in pending:
+            item.delivery_status = "PENDING"
+            item.error = None
+            item.error_category = None
+        return notification.with_items(pending)
+
+    def _settle(self, breaker, items):
+        # Only transient failures move on to the next vendor; a vendor that fails
+        # every item that way counts against its circuit
+        unsent = [item for item in items if item.delivery_status != "SENT"]
+        transient = [item for item in unsent if item.error_category in TRANSIENT_ERRORS]
+        if transient and len(transient) == len(items):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return transient
+
+    def _finish_failover(self, notification, pending, attempted, handled, last_error):
+        if attempted and not handled:
+            raise last_error
+        if not attempted:
+            for item in pending:
+                item.delivery_status = "FAILED"
+                item.error = "No vendor available: all circuits are open"
+                item.error_category = ErrorCategory.TRANSPORT.value
+        return notification
+
+    def _observe(self, vendor, elapsed: float, items):
+        # Seconds per delivered item, so a vendor that fails fast does not look cheap
+        sent = sum(1 for item in items if item.delivery_status == "SENT")
+        sample = elapsed / max(sent, 1)
+        with self._latency_lock:
+            previous = self.latencies.get(vendor)
+            self.latencies[vendor] = sample if previous is None else previous + LATENCY_SMOOTHING * (sample - previous)
+
+    def _vendor_weight(self, vendor) -> float:
+        if self.dispatch == DispatchMode.LATENCY.value:
+            # Vendors not measured yet get the average so they still receive traffic
+            with self._latency_lock:
+                known = list(self.latencies.values())
+                latency = self.latencies.get(vendor)
+            latency = latency or (sum(known) / len(known) if known else 1.0)
+            return 1.0 / max(latency, 1e-6)
+        provider_config = getattr(vendor, "provider_config", None)
+        return getattr(provider_config, "weight", 1)
+
+    def _shards(self, notification):
+        # Contiguous slices sized by weight, so the notification's items keep their order;
+        # each shard still fails over to the remaining vendors
+        eligible = self.eligible_vendors(notification)
+        healthy = [vendor for vendor in eligible if self.breakers[vendor].available()]
+        if len(healthy) < 2 or len(notification.items) < 2:
+            return None
+        sizes = _split(len(notification.items), [self._vendor_weight(vendor) for vendor in healthy])
+        shards = []
+        start = 0
+        for vendor, size in zip(healthy, sizes):
+            if size:
+                order = [vendor] + [other for other in eligible if other is not vendor]
+                shards.append((notification.with_items(notification.items[start:start + size]), order))
+            start += size
+        return shards
+
+    @_tracked
+    def dispatch_send(self, notification):
+        rendered = self.render_templates(notification)
+        if rendered is not notification:
+            if rendered.items:
+                self.dispatch_send(rendered)
+            return notification
+        shards = None
+        if self.dispatch != DispatchMode.FAILOVER.value:
+            shards = self._shards(notification)
+        if not shards:
+            return self.send_with_failover(notification)
+        if getattr(_pool_thread, "service", None) is self:
+            # Already on a pool thread (send_many), where waiting on the pool could deadlock it
+            for shard, vendors in shards:
+                self.send_with_failover(shard, vendors)
+            return notification
+        executor = self.executor()
+        futures = [executor.submit(self.send_with_failover, shard, vendors) for shard, vendors in shards[1:]]
+        try:
+            self.send_with_failover(*shards[0])
+        finally:
+            for future in futures:
+                future.result()
+        return notification
+
+    @_tracked
+    async def async_dispatch_send(self, notification):
+        rendered = self.render_templates(notification)
+        if rendered is not notification:
+            if rendered.items:
+                await self.async_dispatch_send(rendered)
+            return notification
+        shards = None
+        if self.dispatch != DispatchMode.FAILOVER.value:
+            shards = self._shards(notification)
+        if not shards:
+            return await self.async_send_with_failover(notification)
+        await asyncio.gather(*(self.async_send_with_failover(shard, vendors) for shard, vendors in shards))
+        return notification
+
+    def send_with_failover(self, notification, vendors=None):
+        pending = notification.items
+        attempted = handled = False
+        last_error = None
+        for vendor in vendors if vendors is not None else self.eligible_vendors(notification):
+            if attempted and self._expired(notification):
+                break
+            breaker = self.breakers[vendor]
+            if not breaker.allow_request():
+                continue
+            attempted = True
+            started = time.monotonic()
+            try:
+                self.retry_policies[vendor].run(
+                    vendor.send, self._failover_batch(notification, pending), notification.deadline)
+            except Exception as e:
+                breaker.record_failure()
+                last_error = e
+                pending = [item for item in pending if item.delivery_status != "SENT"]
+                continue
+            handled = True
+            attempt_items = pending
+            pending = self._settle(breaker, pending)
+            self._observe(vendor, time.monotonic() - started, attempt_items)
+            if self.deliveries is not None:
+                self.deliveries.track(self.accounts[vendor], attempt_items)
+            if not pending:
+                break
+        return self._finish_failover(notification, pending, attempted, handled, last_error)
+
+    async def async_send_with_failover(self, notification, vendors=None):
+        pending = notification.items
+        attempted = handled = False
+        last_error = None
+        for vendor in vendors if vendors is not None else self.eligible_vendors(notification):
+            if attempted and self._expired(notification):
+                break
+            breaker = self.breakers[vendor]
+            if not breaker.allow_request():
+                continue
+            attempted = True
+            started = time.monotonic()
+            try:
+                await self.retry_policies[vendor].async_run(
+                    vendor.async_send, self._failover_batch(notification, pending), notification.deadline)
+            except Exception as e:
+                breaker.record_failure()
+                last_error = e
+                pending = [item for item in pending if item.delivery_status != "SENT"]
+                continue
+            handled = True
+            attempt_items = pending
+            pending = self._settle(breaker, pending)
+            self._observe(vendor, time.monotonic() - started, attempt_items)
+            if self.deliveries is not None:
+                self.deliveries.track(self.accounts[vendor], attempt_items)
+            if not pending:
+                break
+        return self._finish_failover(notification, pending, attempted, handled, last_error)
+
+
+def _vendor_name(vendor) -> str:
+    provider_config = getattr(vendor, "provider_config", None)
+    return provider_config.name if provider_config is not None else vendor.__class__.__name__
+
+
+def _vendor_resources(vendor) -> list:
+    # Connection pools a vendor holds: its requests session and its async transport
+    resources = []
+    transport = getattr(vendor, "async_transport", None)
+    for resource in (getattr(vendor, "session", None), transport, getattr(transport, "session", None)):
+        if resource is not None and all(resource is not seen for seen in resources):
+            resources.append(resource)
+    return resources
+
+
+def _shared_fields(notification):
+    fields = tuple(sorted(
+        (name, repr(value)) for name, value in vars(notification).items() if name not in ("identifier", "items")))
+    return notification.__class__, fields
+
+
+def _split(total: int, weights: List[float]) -> List[int]:
+    # Largest-remainder apportionment: sizes are proportional to weight and sum to total
+    weight_sum = sum(weights)
+    exact = [total * weight / weight_sum for weight in weights]
+    sizes = [int(share) for share in exact]
+    by_remainder = sorted(range(len(weights)), key=lambda i: exact[i] - sizes[i], reverse=True)
+    for i in by_remainder[:total - sum(sizes)]:
+        sizes[i] += 1
+    return sizes
+
+
+async def _async_chunks(items, chunk_size: int):
+    chunk = []
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    else:
+        for item in items:
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
@@ -1,43 +1,46 @@
 import re
-from typing import Any
+from typing import Any, Optional
+from notify_lib.constants import Channel
 from notify_lib.models.notifications import EmailNotification
 from notify_lib.services.base import NotificationService
 
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
 
 class EmailService(NotificationService):
-    def __init__(self, vendors):
-        self.vendors = vendors
-        self.vendor = vendors[0]
+    channel = Channel.EMAIL.value
 
     def send(self, notification: EmailNotification) -> str:
-        try:
-            return self.vendor.send(notification)
-        except Exception as e:
-            raise
+        return self.dispatch_send(notification)
 
     async def async_send(self, notification: EmailNotification) -> str:
-        try:
-            return await self.vendor.async_send(notification)
-        except Exception as e:
-            raise
+        return await self.async_dispatch_send(notification)
 
     def safety_check(self, notification: EmailNotification) -> bool:
         if not notification.items:
             return False
-        if not self._is_valid_email(notification.from_email):
-            return False
-        if not notification.subject:
+        if not self._is_valid_email(notification.from_email or getattr(self.vendor, "from_email", None)):
             return False
-        for item in notification.items:
-            if not self._is_valid_email(item.recipient):
-                return False
         return True
 
+    def item_error(self, notification: EmailNotification, item) -> Optional[str]:
+        if not self._is_valid_email(item.recipient):
+            return f"Invalid email address: {item.recipient}"
+        if not getattr(notification, "template_id", None):
+            if not item.subject:
+                return "Missing subject"
+            if not item.message:
+                return "Missing message or message template"
+        return None
+
     def get_notification_class(self) -> Any:
         return EmailNotification
 
+    @staticmethod
+    def recipient_key(recipient: str) -> str:
+        return recipient.lower()
+
     def _is_valid_email(self, email: str) -> bool:
         if not email:
             return False
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return bool(re.match(pattern, email))
\ No newline at end of file
+        return EMAIL_PATTERN.match(email) is not None
@@ -0,0 +1,83 @@
+import asyncio
+import random
+import time
+from typing import Optional
+
+from notify_lib.constants import TRANSIENT_ERRORS
+from notify_lib.metrics import NULL_METRICS
+
+
+class RetryPolicy:
+
+    def __init__(
+            self, max_retries: int = 3, backoff: float = 0.5, backoff_max: float = 10.0,
+            metrics=NULL_METRICS, vendor_name: str = ""):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.metrics = metrics
+        self.vendor_name = vendor_name
+
+    def delay(self, attempt: int) -> float:
+        # Full jitter keeps retries from many workers from landing together
+        return random.uniform(0, min(self.backoff_max, self.backoff * (2 ** attempt)))
+
+    def is_retryable(self, item) -> bool:
+        return item.delivery_status != "SENT" and item.error_category in TRANSIENT_ERRORS
+
+    def run(self, send, notification, deadline: Optional[float] = None):
+        send(notification)
+        attempt = 0
+        while True:
+            failed = [item for item in notification.items if self.is_retryable(item)]
+            if not failed or attempt >= self.max_retries:
+                return notification
+            delay = self.delay(attempt)
+            if deadline is not None and time.time() + delay >= deadline:
+                return notification
+            time.sleep(delay)
+            batch, previous = self.retry_batch(notification, failed)
+            try:
+                send(batch)
+            except Exception:
+                self.restore(failed, previous)
+                raise
+            attempt += 1
+
+    async def async_run(self, send, notification, deadline: Optional[float] = None):
+        await send(notification)
+        attempt = 0
+        while True:
+            failed = [item for item in notification.items if self.is_retryable(item)]
+            if not failed or attempt >= self.max_retries:
+                return notification
+            delay = self.delay(attempt)
+            if deadline is not None and time.time() + delay >= deadline:
+                return notification
+            await asyncio.sleep(delay)
+            batch, previous = self.retry_batch(notification, failed)
+            try:
+                await send(batch)
+            except Exception:
+                self.restore(failed, previous)
+                raise
+            attempt += 1
+
+    def retry_batch(self, notification, failed):
+        # Returns the batch to send again and the items' previous results, for `restore`
+        self.metrics.record_retry(self.vendor_name, len(failed))
+        previous = [(item.delivery_status, item.error, item.error_category) for item in failed]
+        for item in failed:
+            item.delivery_status = "PENDING"
+            item.error = None
+            item.error_category = None
+        return notification.with_items(failed), previous
+
+    @staticmethod
+    def restore(failed, previous):
+        # After a retry raised: items it never reached get their last error back
+        for item, (status, error, category) in zip(failed, previous):
+            if item.delivery_status == "PENDING":
+                item.delivery_status = status
+                item.error = error
+                item.error_category = category
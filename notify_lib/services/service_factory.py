@@ -1,21 +1,26 @@
-from notify_lib.config import NotifyConfig, notify_config_from_dict, validate_notify_config
+from notify_lib.config import NotifyConfig, load_notify_config
 from notify_lib.constants import Channel
+from notify_lib.metrics import NULL_METRICS, MetricsSink
+from notify_lib.templates import build_template_cache
 from notify_lib.vendors.vendor_factory import VendorFactory
 from notify_lib.services.email_service import EmailService
 from notify_lib.services.sms_service import SmsService
-from typing import Any
+from typing import Any, Optional
 
 
 class ServiceFactory:
 
     @staticmethod
-    def create_service(channel: Channel, config: Any):
-        # Normalize config to NotifyConfig and validate
-        if isinstance(config, dict):
-            config = notify_config_from_dict(config)
-        elif not isinstance(config, NotifyConfig):
-            raise ValueError("config must be a NotifyConfig or dict")
-        validate_notify_config(config)
+    def create_service(channel: Channel, config: Any, metrics: Optional[MetricsSink] = None):
+        return ServiceFactory.build_service(channel, load_notify_config(config), metrics)
+
+    @staticmethod
+    def build_service(
+            channel: Channel, config: NotifyConfig, metrics: Optional[MetricsSink] = None,
+            previous=None, previous_config: Optional[NotifyConfig] = None):
+        # `config` must already be normalized and validated (see load_notify_config). On reload,
+        # `previous` is the service being replaced, built from `previous_config`: its unchanged
+        # vendors, stores and caches are reused and the rest of its state is carried over
 
         # Ensure the requested channel is configured
         if channel == Channel.SMS.value and (config.sms is None):
@@ -23,10 +28,43 @@ class ServiceFactory:
         if channel == Channel.EMAIL.value and (config.email is None):
             raise ValueError("No Email configuration provided")
 
-        vendors = VendorFactory.get_vendors(channel, config)
+        vendors = VendorFactory.get_vendors(channel, config, previous.vendors if previous else None)
+        # Optional features are imported only when configured, keeping cold starts short
+        outbox = idempotency = None
+        if config.outbox is not None:
+            from notify_lib.outbox import shared_outbox
+            outbox = shared_outbox(config.outbox)
+        if previous is not None and previous_config.idempotency == config.idempotency:
+            idempotency = previous.idempotency
+        elif config.idempotency is not None:
+            from notify_lib.idempotency import build_idempotency_store
+            idempotency = build_idempotency_store(config.idempotency)
+        if previous is not None and previous_config.templates == config.templates:
+            templates = previous.templates
+        else:
+            templates = build_template_cache(config.templates)
         if channel == Channel.EMAIL.value:
-            return EmailService(vendors)
+            service_class, channel_config = EmailService, config.email
         elif channel == Channel.SMS.value:
-            return SmsService(vendors)
+            service_class, channel_config = SmsService, config.sms
         else:
             raise ValueError(f"Unknown Channel: {channel}")
+        deliveries, poll_batch_size = None, 500
+        if config.reconciliation is not None:
+            poll_batch_size = config.reconciliation.poll_batch_size
+            if previous is not None and previous.deliveries is not None:
+                # Sends still awaiting reports stay tracked across a reload
+                deliveries = previous.deliveries
+                deliveries.max_entries = config.reconciliation.max_entries
+            else:
+                from notify_lib.reconciliation import DeliveryIndex
+                deliveries = DeliveryIndex(config.reconciliation.max_entries, service_class.recipient_key)
+        service = service_class(
+            vendors, channel_config.dispatch, outbox, idempotency, metrics or NULL_METRICS,
+            channel_config.send_workers, templates, deliveries, poll_batch_size)
+        if previous is None:
+            service.attach_outbox()
+        else:
+            # The reload attaches the replacement to the outbox once it is swapped in
+            service.adopt_state(previous)
+        return service
@@ -1,46 +1,49 @@
-import re
-from typing import Any
-from notify_lib.constants import MessageType
+from typing import Any, Optional
+from notify_lib.constants import Channel, MessageType
 from notify_lib.models.notifications import SmsNotification
+from notify_lib.phone import normalize_phone
 from notify_lib.services.base import NotificationService
 
 
 class SmsService(NotificationService):
-    def __init__(self, vendors):
-        self.vendors = vendors
-        self.vendor = vendors[0]
+    channel = Channel.SMS.value
 
     def send(self, notification: SmsNotification) -> str:
-        try:
-            if notification.message_type == MessageType.OTP.value and not self.vendor.supports_otp():
-                raise ValueError(f"Vendor {self.vendor.__class__.__name__} does not support OTP messages")
-            return self.vendor.send(notification)
-        except Exception as e:
-            raise
+        return self.dispatch_send(notification)
 
     async def async_send(self, notification: SmsNotification) -> str:
-        try:
-            if notification.message_type == MessageType.OTP.value and not self.vendor.supports_otp():
-                raise ValueError(f"Vendor {self.vendor.__class__.__name__} does not support OTP messages")
-            return await self.vendor.async_send(notification)
-        except Exception as e:
-            raise
+        return await self.async_dispatch_send(notification)
+
+    def eligible_vendors(self, notification: SmsNotification):
+        if notification.message_type != MessageType.OTP.value:
+            return self.vendors
+        vendors = [vendor for vendor in self.vendors if vendor.supports_otp()]
+        if not vendors:
+            raise ValueError(f"Vendor {self.vendor.__class__.__name__} does not support OTP messages")
+        return vendors
 
     def safety_check(self, notification: SmsNotification) -> bool:
         if not notification.items:
             return False
-        for item in notification.items:
-            if not self._is_valid_phone(item.recipient):
-                return False
-            if notification.message_type == MessageType.OTP.value and not item.otp:
-                return False
         return True
 
+    def item_error(self, notification: SmsNotification, item) -> Optional[str]:
+        if not self._is_valid_phone(item.recipient):
+            return f"Invalid phone number: {item.recipient}"
+        if notification.message_type == MessageType.OTP.value:
+            if not item.otp:
+                return "Missing OTP value"
+        elif not item.message:
+            return "Missing message or message template"
+        return None
+
     def get_notification_class(self) -> Any:
         return SmsNotification
 
+    @staticmethod
+    def recipient_key(recipient: str) -> Optional[str]:
+        # Delivery reports may spell a number differently from the item
+        return normalize_phone(recipient)
+
     def _is_valid_phone(self, phone: str) -> bool:
-        if not phone:
-            return False
-        cleaned = re.sub(r'[\s\-\(\)]', '', phone)
-        return len(cleaned) >= 10 and cleaned.isdigit()
\ No newline at end of file
+        return normalize_phone(phone) is not None
@@ -0,0 +1,118 @@
+import string
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from notify_lib.config import TemplateConfig
+
+# Item attributes a template may use when its variables do not provide the field
+ITEM_FIELDS = ("otp", "recipient")
+
+_formatter = string.Formatter()
+
+
+class MessageTemplate:
+    # A message body with `{name}` placeholders, parsed and checked once; rendering is a
+    # single str.format_map over the item's variables
+    __slots__ = ("text", "fields")
+
+    def __init__(self, text: str):
+        if not isinstance(text, str):
+            raise ValueError(f"Message template must be a string, got {type(text).__name__}")
+        fields = []
+        for _, name, _, _ in _formatter.parse(text):
+            if name is None:
+                continue
+            if not name.isidentifier():
+                raise ValueError(f"Template fields must be plain names, got {{{name}}}")
+            if name not in fields:
+                fields.append(name)
+        self.text = text
+        self.fields = tuple(fields)
+
+    def render(self, variables: Optional[dict], item=None) -> str:
+        try:
+            return self.text.format_map(variables or {})
+        except KeyError:
+            pass
+        context = dict(variables or {})
+        for name in self.fields:
+            if name in context:
+                continue
+            value = getattr(item, name, None) if name in ITEM_FIELDS else None
+            if value is None:
+                raise ValueError(f"Missing template variable: {name}")
+            context[name] = value
+        return self.text.format_map(context)
+
+
+class TemplateCache:
+    # Compiled templates by ID or by text. Registered IDs are kept for the life of the cache;
+    # a reference that is not a registered ID is compiled as template text and kept in an
+    # LRU of `max_entries`, so ad-hoc templates are parsed once per process, not per item.
+    # Text without a placeholder is rejected, so a mistyped ID is never sent as the body
+
+    def __init__(self, max_entries: int = 1024, templates: Optional[Dict[str, str]] = None):
+        self.max_entries = max_entries
+        self._registered: Dict[str, MessageTemplate] = {}
+        self._compiled = OrderedDict()
+        self._lock = threading.Lock()
+        for template_id, text in (templates or {}).items():
+            self.register(template_id, text)
+
+    def register(self, template_id: str, text: str) -> MessageTemplate:
+        template = MessageTemplate(text)
+        with self._lock:
+            self._registered[template_id] = template
+        return template
+
+    def get(self, ref: str) -> MessageTemplate:
+        template = self._registered.get(ref)
+        if template is not None:
+            return template
+        with self._lock:
+            template = self._compiled.get(ref)
+            if template is not None:
+                self._compiled.move_to_end(ref)
+                return template
+        template = MessageTemplate(ref)
+        if not template.fields:
+            raise ValueError(f"{ref!r} is not a registered template ID and has no placeholders")
+        with self._lock:
+            self._compiled[ref] = template
+            while len(self._compiled) > self.max_entries:
+                self._compiled.popitem(last=False)
+        return template
+
+    def renderer(self) -> Callable:
+        # Renders one item into `message` and returns an error or None. The memo in front of
+        # the cache means a batch touches the lock once per distinct template, not per item
+        memo = {}
+
+        def render(item) -> Optional[str]:
+            ref = item.message_template
+            template = memo.get(ref)
+            if template is None:
+                try:
+                    template = memo[ref] = self.get(ref)
+                except ValueError as e:
+                    template = memo[ref] = f"Invalid message template: {e}"
+            if isinstance(template, str):
+                return template
+            try:
+                item.message = template.render(item.variables, item)
+            except ValueError as e:
+                return str(e)
+            return None
+
+        return render
+
+
+# Used by services built without a TemplateConfig
+TEMPLATES = TemplateCache()
+
+
+def build_template_cache(config: Optional[TemplateConfig]) -> TemplateCache:
+    if config is None:
+        return TEMPLATES
+    return TemplateCache(config.cache_size, config.templates)
@@ -0,0 +1,134 @@
+import asyncio
+import collections
+import threading
+import time
+from typing import Callable, Optional
+
+
+class AdaptiveController:
+    # AIMD tuning of one vendor's in-flight requests and items per request. A request that
+    # is throttled, fails on the server or transport side, or takes longer than
+    # `target_latency` halves both setpoints (at most once per `target_latency`, so one
+    # burst of failures counts once); every other request adds about one request of
+    # concurrency per round trip and a twentieth of the batch range.
+
+    def __init__(
+            self, max_concurrency: int, max_batch_size: int, min_concurrency: int = 1, min_batch_size: int = 1,
+            target_latency: float = 1.0, decrease_factor: float = 0.5):
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.target_latency = target_latency
+        self.decrease_factor = decrease_factor
+        self._concurrency = float(max(min_concurrency, min(max_concurrency, 10)))
+        self._batch_size = float(max_batch_size)
+        self._batch_step = max(1.0, (max_batch_size - min_batch_size) / 20)
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+        self.successes = 0
+        self.congestion_signals = 0
+        self.decreases = 0
+        self.last_latency = None
+
+    @property
+    def concurrency(self) -> int:
+        return int(self._concurrency)
+
+    @property
+    def batch_size(self) -> int:
+        return int(self._batch_size)
+
+    def record(self, latency: float, status_code: Optional[int]):
+        # `status_code` is None when the request raised before a response arrived
+        congested = (
+            status_code is None or status_code == 429 or status_code >= 500 or latency > self.target_latency)
+        with self._lock:
+            self.last_latency = latency
+            if not congested:
+                self.successes += 1
+                self._concurrency = min(self.max_concurrency, self._concurrency + 1.0 / self._concurrency)
+                self._batch_size = min(self.max_batch_size, self._batch_size + self._batch_step / self._concurrency)
+                return
+            self.congestion_signals += 1
+            now = time.monotonic()
+            if now - self._last_decrease < self.target_latency:
+                return
+            self._last_decrease = now
+            self.decreases += 1
+            self._concurrency = max(self.min_concurrency, self._concurrency * self.decrease_factor)
+            self._batch_size = max(self.min_batch_size, self._batch_size * self.decrease_factor)
+
+    def setpoints(self) -> dict:
+        with self._lock:
+            return {
+                "concurrency": int(self._concurrency),
+                "batch_size": int(self._batch_size),
+                "min_concurrency": self.min_concurrency,
+                "max_concurrency": self.max_concurrency,
+                "min_batch_size": self.min_batch_size,
+                "max_batch_size": self.max_batch_size,
+                "target_latency": self.target_latency,
+                "last_latency": self.last_latency,
+                "successes": self.successes,
+                "congestion_signals": self.congestion_signals,
+                "decreases": self.decreases,
+            }
+
+
+def build_controller(adaptive: Optional[dict], max_concurrency: int, max_batch_size: int):
+    # `max_batch_size` is the vendor's own cap; the config may only lower it
+    if not adaptive:
+        return None
+    batch_ceiling = min(max_batch_size, adaptive.get("max_batch_size", max_batch_size))
+    return AdaptiveController(
+        max_concurrency=max_concurrency,
+        max_batch_size=batch_ceiling,
+        min_concurrency=adaptive.get("min_concurrency", 1),
+        min_batch_size=min(batch_ceiling, adaptive.get("min_batch_size", 1)),
+        target_latency=adaptive.get("target_latency", 1.0))
+
+
+class AdaptiveGate:
+    # Semaphore whose limit is read on every acquire and release, so a controller can resize it
+    # live: each one wakes as many waiters as the current limit leaves room for. Bound to one
+    # event loop, like asyncio.Semaphore.
+
+    def __init__(self, limit: Callable[[], int]):
+        self._limit = limit
+        self._in_flight = 0
+        # Waiters woken for a free slot that have not resumed yet; the slot is kept for them
+        self._woken = 0
+        self._waiters = collections.deque()
+
+    async def __aenter__(self):
+        while self._in_flight + self._woken >= max(1, self._limit()):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.cancelled():
+                    if waiter in self._waiters:
+                        self._waiters.remove(waiter)
+                else:
+                    # Woken, then cancelled before resuming: the slot passes to the next waiter
+                    self._woken -= 1
+                    self._wake()
+                raise
+            self._woken -= 1
+        self._in_flight += 1
+        self._wake()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        free = max(1, self._limit()) - self._in_flight - self._woken
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._woken += 1
+                free -= 1
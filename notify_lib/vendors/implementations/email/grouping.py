@@ -0,0 +1,19 @@
+from typing import Dict, Iterable, List, Tuple
+
+
+def content_key(item) -> Tuple:
+    # Subjects travel per personalization, so only the body decides the bucket
+    return item.message or "", getattr(item, "is_html", None) is False
+
+
+def group_items(items: Iterable, max_per_request: int) -> List[List]:
+    # Buckets keep first-seen order so results stay easy to follow in logs
+    buckets: Dict[Tuple, List] = {}
+    for item in items:
+        buckets.setdefault(content_key(item), []).append(item)
+
+    groups = []
+    for bucket in buckets.values():
+        for i in range(0, len(bucket), max_per_request):
+            groups.append(bucket[i:i + max_per_request])
+    return groups
@@ -1,22 +1,56 @@
 import asyncio
+from typing import Optional
 
+from notify_lib.config import ProviderConfig
+from notify_lib.constants import ErrorCategory
 from notify_lib.exceptions import VendorException
+from notify_lib.reconciliation import DELIVERED, UNDELIVERED, DeliveryReport
+from notify_lib.vendors.implementations.email.grouping import group_items
+from notify_lib.vendors.implementations.email.sendgrid_payload import build_grouped_body, build_mail_body
+from notify_lib.vendors.adaptive import build_controller
 from notify_lib.vendors.interfaces.email_vendor import EmailVendor
+from notify_lib.vendors.rate_limiter import shared_bucket
+from notify_lib.vendors.transport import (
+    AsyncTransport, adopt_transport_state, build_session, error_category_for_status, timed_call, timed_request)
+
+
+# Webhook events that settle a recipient; processed, deferred, opens and clicks do not
+EVENT_STATUSES = {
+    "delivered": DELIVERED,
+    "bounce": UNDELIVERED,
+    "dropped": UNDELIVERED,
+}
 
 
 class SendGridEmail(EmailVendor):
 
-    def __init__(self, credentials):
+    def __init__(self, credentials, provider_config: Optional[ProviderConfig] = None):
         self.api_key = credentials.get("api_key") if credentials else None
         self.from_email = credentials.get("from_email") if credentials else None
         self.batch_size = 1000
+        self.provider_config = provider_config or ProviderConfig(name="sendgrid")
+        self.timeout = self.provider_config.timeout
+        options = self.provider_config.options or {}
+        self.api_host = options.get("api_host", "https://api.sendgrid.com")
+        self.group_content = bool(options.get("group_content", False))
+        self.adaptive = build_controller(
+            self.provider_config.adaptive, self.provider_config.max_concurrency, self.batch_size)
+        self.async_transport = AsyncTransport(
+            self.timeout, self.provider_config.max_concurrency,
+            session=build_session(self.provider_config.pool_size),
+            limit=(lambda: self.adaptive.concurrency) if self.adaptive else None)
+        self.sg_client = None
+        self.rate_limiter = shared_bucket(
+            ("sendgrid", self.api_key), self.provider_config.rate_limit, self.provider_config.rate_burst)
 
         try:
             import sendgrid
             from sendgrid.helpers.mail import (
                 Mail, Email, To, Content, Personalization,
-                Attachment, FileContent, FileName, FileType, Disposition, ContentId
+                Attachment, FileContent, FileName, FileType, Disposition, ContentId, Category
             )
+            from sendgrid.helpers.mail.exceptions import ApiKeyIncludedException
+            from sendgrid.helpers.mail.validators import ValidateApiKey
             self.sendgrid = sendgrid
             self.sg_client_class = sendgrid.SendGridAPIClient
             self.mail_class = Mail
@@ -30,19 +64,92 @@ class SendGridEmail(EmailVendor):
             self.file_type_class = FileType
             self.disposition_class = Disposition
             self.content_id_class = ContentId
+            self.category_class = Category
+            self.api_key_validator = ValidateApiKey()
+            self.rejected_content_class = ApiKeyIncludedException
         except ImportError:
             self.sendgrid = None
             self.sg_client_class = None
 
-    def send(self, notification):
+    def close(self):
+        self.async_transport.session.close()
+        self.async_transport.close()
+
+    async def aclose(self):
+        await self.async_transport.aclose()
+
+    def adopt_state(self, previous):
+        adopt_transport_state(self, previous)
+
+    def delivery_reports(self, payload) -> list:
+        # Event webhook batches: sg_message_id is the request's X-Message-Id plus a ".filter..."
+        # suffix, so reports match items by message id and recipient
+        reports = []
+        for event in payload if isinstance(payload, list) else [payload]:
+            status = EVENT_STATUSES.get(event.get("event"))
+            if status is None or not event.get("sg_message_id"):
+                continue
+            message_id = str(event["sg_message_id"]).split(".filter", 1)[0]
+            reports.append(DeliveryReport(
+                message_id, status, event.get("email"), event.get("reason") or event.get("response")))
+        return reports
+
+    def _check_ready(self):
         if not self.sendgrid:
             raise VendorException("VENDOR_DEPENDENCY_ERROR", "SendGrid package not installed")
 
         if not self.api_key:
             raise VendorException("VENDOR_CONFIG_ERROR", "SendGrid API key not configured")
 
-        sg = self.sg_client_class(self.api_key)
+    def _client(self):
+        if self.sg_client is None:
+            self.sg_client = self.sg_client_class(self.api_key, host=self.api_host)
+        return self.sg_client
+
+    def send(self, notification):
+        self._check_ready()
+
+        for batch in self._batches(notification):
+            self._send_batch(notification.with_items(batch))
+
+        return notification
+
+    def _batches(self, notification):
+        batch_size = max(1, self.adaptive.batch_size) if self.adaptive else self.batch_size
+        if self.group_content:
+            return group_items(notification.items, batch_size)
+        return [notification.items[i:i + batch_size] for i in range(0, len(notification.items), batch_size)]
+
+    def _send_batch(self, batch_notification):
+        sg = self._client()
 
+        try:
+            request_body = self._build_request_body(batch_notification)
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            response = timed_call(
+                self.metrics, self.provider_config.name, "mail_send", len(batch_notification.items),
+                sg.client.mail.send.post, request_body=request_body, timeout=self.timeout, controller=self.adaptive)
+            self._apply_response(batch_notification.items, response.status_code, response.body, response.headers)
+        except self.rejected_content_class as e:
+            self._reject_content(batch_notification.items, e)
+        except Exception as e:
+            # python_http_client raises HTTPError subclasses carrying the status for non-2xx replies
+            status_code = getattr(e, "status_code", None)
+            category = error_category_for_status(status_code) if status_code else ErrorCategory.TRANSPORT.value
+            self._mark_failed(batch_notification.items, str(e), category)
+
+    def _build_request_body(self, notification) -> dict:
+        if self.group_content:
+            return build_grouped_body(
+                notification, default_from_email=self.from_email,
+                validate_content=self.api_key_validator.validate_message_text)
+        return build_mail_body(
+            notification, default_from_email=self.from_email,
+            validate_content=self.api_key_validator.validate_message_text)
+
+    def _build_mail(self, notification):
+        # Helper-object equivalent of _build_request_body, kept for callers that need a Mail instance
         from_email = self.email_class(notification.from_email or self.from_email)
 
         mail = self.mail_class(from_email=from_email, subject="")
@@ -58,7 +165,7 @@ class SendGridEmail(EmailVendor):
 
         if hasattr(notification, 'categories') and notification.categories:
             for category in notification.categories:
-                mail.add_category(category)
+                mail.add_category(self.category_class(category))
 
         if hasattr(notification, 'attachments') and notification.attachments:
             for attachment_data in notification.attachments:
@@ -80,8 +187,7 @@ class SendGridEmail(EmailVendor):
                 personalization.subject = item.subject
 
             if item.variables:
-                for key, value in item.variables.items():
-                    personalization.add_dynamic_template_data({key: value})
+                personalization.dynamic_template_data = item.variables
 
             if item.cc:
                 for cc_email in item.cc:
@@ -101,85 +207,50 @@ class SendGridEmail(EmailVendor):
 
             mail.add_personalization(personalization)
 
-        try:
-            response = sg.client.mail.send.post(request_body=mail.get())
-
-            if 200 <= response.status_code < 300:
-                for item in notification.items:
-                    item.delivery_status = "SENT"
-                    item.ext_id = str(response.headers.get("X-Message-Id", ""))
-            else:
-                error_msg = f"SendGrid API error: {response.status_code} - {response.body}"
-                for item in notification.items:
-                    item.delivery_status = "FAILED"
-                    item.error = error_msg
-        except Exception as e:
-            for item in notification.items:
-                item.delivery_status = "FAILED"
-                item.error = str(e)
-
-        return notification
-
-    async def process_batch(self, batch_items, notification):
-        batch_notification = type(notification)()
-        batch_notification.from_email = notification.from_email
-
-        if hasattr(notification, 'template_id'):
-            batch_notification.template_id = notification.template_id
-
-        if hasattr(notification, 'reply_to'):
-            batch_notification.reply_to = notification.reply_to
+        return mail
 
-        if hasattr(notification, 'send_at'):
-            batch_notification.send_at = notification.send_at
+    def _apply_response(self, items, status_code, body, headers):
+        if 200 <= status_code < 300:
+            ext_id = str(headers.get("X-Message-Id", ""))
+            for item in items:
+                item.delivery_status = "SENT"
+                item.ext_id = ext_id
+        else:
+            self._mark_failed(
+                items, f"SendGrid API error: {status_code} - {body}", error_category_for_status(status_code))
 
-        if hasattr(notification, 'categories'):
-            batch_notification.categories = notification.categories
+    def _mark_failed(self, items, error_msg, category):
+        for item in items:
+            item.delivery_status = "FAILED"
+            item.error = error_msg
+            item.error_category = category
 
-        if hasattr(notification, 'attachments'):
-            batch_notification.attachments = notification.attachments
+    def _reject_content(self, items, error):
+        # Content the API key check refuses fails the same on every try and every provider
+        self._mark_failed(items, str(error) or error.__class__.__name__, ErrorCategory.CLIENT.value)
 
-        batch_notification.items = batch_items
+    async def process_batch(self, batch_items, notification):
+        batch_notification = notification.with_items(batch_items)
 
         try:
-            result_notification = self.send(batch_notification)
-            return result_notification
+            request_body = self._build_request_body(batch_notification)
+            if self.rate_limiter:
+                await self.rate_limiter.acquire_async()
+            response = await timed_request(
+                self.metrics, self.provider_config.name, "mail_send", len(batch_items),
+                self.async_transport.request(
+                    "POST", f"{self.api_host}/v3/mail/send", json=request_body,
+                    headers={"Authorization": f"Bearer {self.api_key}"}), controller=self.adaptive)
+            self._apply_response(batch_items, response.status_code, response.text, response.headers)
+        except self.rejected_content_class as e:
+            self._reject_content(batch_items, e)
         except Exception as e:
-            for item in batch_items:
-                item.delivery_status = "FAILED"
-                item.error = str(e)
-            return batch_items
+            self._mark_failed(batch_items, str(e) or e.__class__.__name__, ErrorCategory.TRANSPORT.value)
+        return batch_items
 
     async def async_send(self, notification):
-        if not self.sendgrid:
-            raise VendorException("VENDOR_DEPENDENCY_ERROR", "SendGrid package not installed")
-
-        if not self.api_key:
-            raise VendorException("VENDOR_CONFIG_ERROR", "SendGrid API key not configured")
-
-        all_items = []
-
-        batches = []
-        for i in range(0, len(notification.items), self.batch_size):
-            batch = notification.items[i:i + self.batch_size]
-            batches.append(batch)
+        self._check_ready()
 
-        tasks = []
-        for batch in batches:
-            task = self.process_batch(batch, notification)
-            tasks.append(task)
-
-        batch_results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        for batch_result in batch_results:
-            if isinstance(batch_result, Exception):
-                for _ in range(min(self.batch_size, len(notification.items))):
-                    item = type(notification.items[0])("", "")
-                    item.delivery_status = "FAILED"
-                    item.error = str(batch_result)
-                    all_items.append(item)
-            else:
-                all_items.extend(batch_result)
-
-        notification.items = all_items
-        return notification
\ No newline at end of file
+        # Batches are dispatched together; the transport bounds how many are in flight
+        await asyncio.gather(*(self.process_batch(batch, notification) for batch in self._batches(notification)))
+        return notification
@@ -0,0 +1,140 @@
+import re
+from email.utils import parseaddr
+from typing import Callable, Optional
+
+
+# Builds the v3 mail/send body straight from the items. The output matches
+# Mail.get() from sendgrid.helpers.mail key for key and in the same order,
+# including its quirks: personalizations, attachments and categories are
+# inserted at the front, and text/plain content is placed before text/html.
+
+# Bare addresses come back from parseaddr unchanged, so they can skip it
+PLAIN_ADDRESS_PATTERN = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9._%+-]+')
+
+
+def address(value: Optional[str]) -> dict:
+    if not value:
+        return {}
+    if PLAIN_ADDRESS_PATTERN.fullmatch(value):
+        return {"email": value}
+    name, email = parseaddr(value)
+    if "@" not in email:
+        name = email
+        email = None
+    result = {}
+    if name:
+        result["name"] = name
+    if email:
+        result["email"] = email
+    return result
+
+
+def _unique(addresses: list) -> list:
+    seen = set()
+    unique = []
+    for entry in addresses:
+        key = entry["email"].lower()
+        if key not in seen:
+            seen.add(key)
+            unique.append(entry)
+    return unique
+
+
+def build_personalization(item, substitutions: bool = False) -> dict:
+    personalization = {"to": [address(item.recipient)]}
+    if item.cc:
+        personalization["cc"] = _unique([address(e) for e in item.cc])
+    if item.bcc:
+        personalization["bcc"] = _unique([address(e) for e in item.bcc])
+    if item.subject:
+        personalization["subject"] = item.subject
+    if item.variables:
+        if substitutions:
+            # "{name}" placeholders in a shared body are filled in per recipient
+            personalization["substitutions"] = {
+                "{" + key + "}": str(value) for key, value in item.variables.items()}
+        else:
+            personalization["dynamic_template_data"] = item.variables
+    return personalization
+
+
+def build_content(item) -> dict:
+    if getattr(item, "is_html", None) is False:
+        return {"type": "text/plain", "value": item.message}
+    return {"type": "text/html", "value": item.message}
+
+
+def build_attachment(attachment_data: dict) -> dict:
+    attachment = {
+        "content": attachment_data.get("content", ""),
+        "type": attachment_data.get("type", "application/octet-stream"),
+        "filename": attachment_data.get("filename", "attachment"),
+        "disposition": attachment_data.get("disposition", "attachment"),
+    }
+    if "content_id" in attachment_data:
+        attachment["content_id"] = attachment_data["content_id"]
+    return attachment
+
+
+def build_mail_body(notification, default_from_email: Optional[str] = None,
+                    validate_content: Optional[Callable[[str], None]] = None) -> dict:
+    personalizations = []
+    text_contents = []
+    html_contents = []
+    validated = set()
+
+    for item in notification.items:
+        personalizations.append(build_personalization(item))
+
+        if item.message:
+            if validate_content is not None and item.message not in validated:
+                validate_content(item.message)
+                validated.add(item.message)
+            content = build_content(item)
+            if content["type"] == "text/plain":
+                text_contents.append(content)
+            else:
+                html_contents.append(content)
+
+    personalizations.reverse()
+    text_contents.reverse()
+    return _envelope(notification, personalizations, text_contents + html_contents, default_from_email)
+
+
+def build_grouped_body(notification, default_from_email: Optional[str] = None,
+                       validate_content: Optional[Callable[[str], None]] = None) -> dict:
+    # Every item shares the first item's body (see grouping.group_items); variables
+    # become substitutions unless a dynamic template renders them
+    use_substitutions = not getattr(notification, "template_id", None)
+    personalizations = [build_personalization(item, use_substitutions) for item in notification.items]
+    personalizations.reverse()
+
+    contents = []
+    first = notification.items[0]
+    if first.message:
+        if validate_content is not None:
+            validate_content(first.message)
+        contents.append(build_content(first))
+    return _envelope(notification, personalizations, contents, default_from_email)
+
+
+def _envelope(notification, personalizations: list, contents: list, default_from_email: Optional[str]) -> dict:
+    attachments = [build_attachment(a) for a in getattr(notification, "attachments", None) or []]
+    attachments.reverse()
+    categories = list(getattr(notification, "categories", None) or [])
+    categories.reverse()
+    reply_to = getattr(notification, "reply_to", None)
+
+    body = {
+        "from": address(notification.from_email or default_from_email),
+        "subject": "",
+        "personalizations": personalizations,
+        "content": contents,
+        "attachments": attachments,
+        "template_id": getattr(notification, "template_id", None) or None,
+        "categories": categories,
+        "send_at": getattr(notification, "send_at", None) or None,
+        "reply_to": address(reply_to) if reply_to else None,
+    }
+    return {key: value for key, value in body.items()
+            if value is not None and value != [] and value != {}}
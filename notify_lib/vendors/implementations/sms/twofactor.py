@@ -1,247 +1,412 @@
-import requests
 import asyncio
-import functools
+from typing import Optional
 
-from notify_lib.constants import MessageType
+from notify_lib.config import ProviderConfig
+from notify_lib.constants import ErrorCategory, MessageType
 from notify_lib.exceptions import VendorException
 from notify_lib.models.notifications import Notification
+from notify_lib.phone import normalize_phone
+from notify_lib.reconciliation import DELIVERED, UNDELIVERED, DeliveryReport
+from notify_lib.vendors.adaptive import build_controller
 from notify_lib.vendors.interfaces.sms_vendor import SmsVendor
+from notify_lib.vendors.rate_limiter import shared_bucket
+from notify_lib.vendors.transport import (
+    AsyncTransport, adopt_transport_state, build_session, error_category_for_status, timed_call, timed_request)
+
+
+SMS_MODULES = {
+    MessageType.TRANSACTIONAL.value: "TRANS_SMS",
+    MessageType.PROMOTIONAL.value: "PROMO_SMS",
+}
+
+
+# Delivery-report states that are final; anything else (submitted, awaited...) is still in flight
+REPORT_STATUSES = {
+    "DELIVERED": DELIVERED,
+    "DELIVRD": DELIVERED,
+    "UNDELIVERED": UNDELIVERED,
+    "UNDELIV": UNDELIVERED,
+    "FAILED": UNDELIVERED,
+    "REJECTED": UNDELIVERED,
+    "EXPIRED": UNDELIVERED,
+}
+
+
+def sms_module(notification) -> str:
+    # Derived per call, so one vendor instance can serve every message type concurrently
+    message_type = getattr(notification, "message_type", MessageType.TRANSACTIONAL.value)
+    return SMS_MODULES.get(message_type, "OTP")
 
 
 class TwoFactor(SmsVendor):
 
-    def __init__(self, credentials):
+    def __init__(self, credentials, provider_config: Optional[ProviderConfig] = None):
         self.api_key = credentials.get("api_key") if credentials else None
         if not self.api_key:
             raise VendorException("VENDOR_CONFIG_ERROR", "2Factor API key not configured")
         self.sender_id = credentials.get("sender_id") if credentials else None
-        self.api_url = "https://2factor.in/API/R1/"  # For SMS
-        self.api_url_v1 = "https://2factor.in/API/V1/"  # For OTP
         self.batch_size = 1000
-        self.sms_type = None
+        self.provider_config = provider_config or ProviderConfig(name="twofactor")
+        self.timeout = self.provider_config.timeout
+        options = self.provider_config.options or {}
+        self.api_url = options.get("api_url", "https://2factor.in/API/R1/")  # For SMS
+        self.api_url_v1 = options.get("api_url_v1", "https://2factor.in/API/V1/")  # For OTP
+        # Bulk mode submits one request per distinct message with comma-separated recipients
+        self.bulk_sms = bool(options.get("bulk_sms", False))
+        self.bulk_chunk_size = int(options.get("bulk_chunk_size", 1000))
+        self.adaptive = build_controller(
+            self.provider_config.adaptive, self.provider_config.max_concurrency, self.batch_size)
+        self.session = build_session(self.provider_config.pool_size)
+        self.async_transport = AsyncTransport(
+            self.timeout, self.provider_config.max_concurrency, session=self.session,
+            limit=(lambda: self.adaptive.concurrency) if self.adaptive else None)
+        self.rate_limiter = shared_bucket(
+            ("twofactor", self.api_key), self.provider_config.rate_limit, self.provider_config.rate_burst)
+
+    def close(self):
+        self.session.close()
+        self.async_transport.close()
+
+    async def aclose(self):
+        await self.async_transport.aclose()
+
+    def adopt_state(self, previous):
+        adopt_transport_state(self, previous)
 
     def supports_otp(self) -> bool:
         return True
 
+    def delivery_reports(self, payload) -> list:
+        # DLR callbacks: one report, or a list of them, carrying the session id, status and number
+        reports = []
+        for report in payload if isinstance(payload, list) else [payload]:
+            ext_id = _first(report, "SessionId", "session_id", "sessionid")
+            status = REPORT_STATUSES.get(str(_first(report, "Status", "status") or "").upper())
+            if ext_id is None or status is None:
+                continue
+            reports.append(DeliveryReport(
+                str(ext_id), status, _first(report, "Number", "number", "To", "to", "mobile"),
+                _first(report, "Reason", "reason", "Description")))
+        return reports
+
+    def fetch_delivery_reports(self, ext_ids) -> list:
+        # Polls the report endpoint once per session id; ids still in flight yield no report
+        reports = []
+        for ext_id in ext_ids:
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            try:
+                response = timed_call(
+                    self.metrics, self.provider_config.name, "report", 1,
+                    self.session.get, self._report_url(ext_id), timeout=self.timeout, controller=self.adaptive)
+            except Exception:
+                continue
+            reports.extend(self._report_from_response(ext_id, response))
+        return reports
+
+    async def async_fetch_delivery_reports(self, ext_ids) -> list:
+        async def fetch(ext_id):
+            if self.rate_limiter:
+                await self.rate_limiter.acquire_async()
+            try:
+                response = await timed_request(
+                    self.metrics, self.provider_config.name, "report", 1,
+                    self.async_transport.request("GET", self._report_url(ext_id)), controller=self.adaptive)
+            except Exception:
+                return []
+            return self._report_from_response(ext_id, response)
+
+        results = await asyncio.gather(*(fetch(ext_id) for ext_id in ext_ids))
+        return [report for result in results for report in result]
+
+    def _report_url(self, ext_id: str) -> str:
+        return f"{self.api_url_v1}{self.api_key}/ADDON_SERVICES/RPT/TSMS/{ext_id}"
+
+    def _report_from_response(self, ext_id: str, response) -> list:
+        if response.status_code != 200:
+            return []
+        try:
+            response_data = response.json()
+        except ValueError:
+            return []
+        if response_data.get("Status") != "Success":
+            return []
+        return self.delivery_reports({"SessionId": ext_id, "Status": response_data.get("Details")})
+
     def send(self, notification):
-        if notification.message_type == MessageType.TRANSACTIONAL.value:
-            self.sms_type = "TRANS_SMS"
-        elif notification.message_type == MessageType.PROMOTIONAL.value:
-            self.sms_type = "PROMO_SMS"
-        else:
-            self.sms_type = "OTP"
-        if self.sms_type == "OTP":
+        if sms_module(notification) == "OTP":
             return self._send_otp(notification)
         return self._send_sms(notification)
 
     def _send_sms(self, notification) -> Notification:
+        if self.bulk_sms:
+            for payload, members in self._bulk_chunks(notification.items, notification):
+                self._send_bulk_sync(payload, members)
+            return notification
         for item in notification.items:
-            try:
-                phone = item.recipient
-                if not phone.startswith("91") and not phone.startswith("+91"):
-                    phone = "91" + phone.lstrip("+")
-                payload = {
-                    "module": self.sms_type,
-                    "apikey": self.api_key,
-                    "to": phone,
-                    "from": notification.sender_id or self.sender_id or "HEADER",
-                    "msg": item.message
-                }
-                if self.sms_type == "TRANS_SMS" and hasattr(notification, "dlt_data"):
-                    dlt_data = getattr(notification, "dlt_data", {})
-                    if "pe_id" in dlt_data:
-                        payload["peid"] = dlt_data["pe_id"]
-                    if "template_id" in dlt_data:
-                        payload["ctid"] = dlt_data["template_id"]
-                response = requests.post(self.api_url, data=payload)
-                if response.status_code == 200:
-                    try:
-                        response_data = response.json()
-                        if response_data.get("Status") == "Success":
-                            item.delivery_status = "SENT"
-                            item.ext_id = str(response_data.get("Details", ""))
-                        else:
-                            error_msg = response_data.get("Details", "Unknown error")
-                            item.delivery_status = "FAILED"
-                            item.error = error_msg
-                    except (ValueError, KeyError) as e:
-                        if "Success" in response.text:
-                            item.delivery_status = "SENT"
-                            item.ext_id = "2factor_sent"
-                        else:
-                            item.delivery_status = "FAILED"
-                            item.error = f"Invalid response: {response.text}"
-                else:
-                    error_msg = f"2Factor API error: {response.status_code} - {response.text}"
-                    item.delivery_status = "FAILED"
-                    item.error = error_msg
-            except Exception as e:
-                item.delivery_status = "FAILED"
-                item.error = str(e)
+            self._send_sms_single_sync(item, notification)
         return notification
 
     def _send_otp(self, notification):
         for item in notification.items:
+            self._send_otp_single_sync(item)
+        return notification
+
+    def _sms_payload(self, item, phone: str, notification=None) -> dict:
+        module = sms_module(notification)
+        payload = {
+            "module": module,
+            "apikey": self.api_key,
+            # R1 takes the number without the leading "+"
+            "to": phone[1:],
+            "from": getattr(notification, "sender_id", None) or self.sender_id or "HEADER",
+            "msg": item.message
+        }
+        if module == "TRANS_SMS":
+            dlt_data = getattr(item, "dlt_data", None) or getattr(notification, "dlt_data", None) or {}
+            if "pe_id" in dlt_data:
+                payload["peid"] = dlt_data["pe_id"]
+            if "template_id" in dlt_data:
+                payload["ctid"] = dlt_data["template_id"]
+        return payload
+
+    def _otp_url(self, item, phone: str) -> str:
+        template_part = f"/{item.template_name}" if item.template_name else ""
+        return f"{self.api_url_v1}{self.api_key}/SMS/{phone}/{item.otp}{template_part}"
+
+    def _fail(self, item, error, category):
+        item.delivery_status = "FAILED"
+        item.error = error
+        item.error_category = category
+        return item
+
+    def _apply_response(self, item, response, fallback_ext_id: str):
+        if response.status_code == 200:
             try:
-                if not item.otp:
-                    item.delivery_status = "FAILED"
-                    item.error = "Missing OTP value"
-                    continue
-                phone = item.recipient
-                if not phone.startswith("+"):
-                    if phone.startswith("91"):
-                        phone = "+" + phone
-                    else:
-                        phone = "+91" + phone.lstrip("+")
-                template_part = f"/{item.template_name}" if item.template_name else ""
-                api_url = f"{self.api_url_v1}{self.api_key}/SMS/{phone}/{item.otp}{template_part}"
-                response = requests.get(api_url, params=item.variables)
-                if response.status_code == 200:
-                    try:
-                        response_data = response.json()
-                        if response_data.get("Status") == "Success":
-                            item.delivery_status = "SENT"
-                            item.ext_id = str(response_data.get("Details", ""))
-                        else:
-                            error_msg = response_data.get("Details", "Unknown error")
-                            item.delivery_status = "FAILED"
-                            item.error = error_msg
-                    except (ValueError, KeyError) as e:
-                        if "Success" in response.text:
-                            item.delivery_status = "SENT"
-                            item.ext_id = "2factor_otp_sent"
-                        else:
-                            item.delivery_status = "FAILED"
-                            item.error = f"Invalid response: {response.text}"
-                    except Exception as e:
-                        item.delivery_status = "FAILED"
-                        item.error = str(e)
+                response_data = response.json()
+                if response_data.get("Status") == "Success":
+                    item.delivery_status = "SENT"
+                    item.ext_id = str(response_data.get("Details", ""))
                 else:
-                    error_msg = f"2Factor API error: {response.status_code} - {response.text}"
-                    item.delivery_status = "FAILED"
-                    item.error = error_msg
-            except Exception as e:
-                item.delivery_status = "FAILED"
-                item.error = str(e)
-        return notification
+                    error_msg = response_data.get("Details", "Unknown error")
+                    self._fail(item, error_msg, ErrorCategory.PROVIDER.value)
+            except (ValueError, KeyError):
+                if "Success" in response.text:
+                    item.delivery_status = "SENT"
+                    item.ext_id = fallback_ext_id
+                else:
+                    self._fail(item, f"Invalid response: {response.text}", ErrorCategory.SERVER.value)
+        else:
+            error_msg = f"2Factor API error: {response.status_code} - {response.text}"
+            self._fail(item, error_msg, error_category_for_status(response.status_code))
+        return item
+
+    def _bulk_chunks(self, items, notification=None):
+        # Items whose request would differ only in "to" share a group: same text, sender and DLT ids
+        groups = {}
+        for item in items:
+            phone = normalize_phone(item.recipient)
+            if phone is None:
+                self._fail(item, f"Invalid phone number: {item.recipient}", ErrorCategory.CLIENT.value)
+                continue
+            payload = self._sms_payload(item, phone, notification)
+            number = payload.pop("to")
+            key = tuple(payload.items())
+            if key not in groups:
+                groups[key] = (payload, [])
+            groups[key][1].append((item, number))
+        for payload, members in groups.values():
+            chunk_size = self.bulk_chunk_size
+            if self.adaptive:
+                chunk_size = max(1, min(chunk_size, self.adaptive.batch_size))
+            for i in range(0, len(members), chunk_size):
+                yield payload, members[i:i + chunk_size]
 
-    def _send_sms_single_sync(self, item):
+    def _bulk_payload(self, payload: dict, members) -> dict:
+        numbers = list(dict.fromkeys(number for _, number in members))
+        return dict(payload, to=",".join(numbers))
+
+    def _apply_bulk_response(self, members, response):
+        if response.status_code != 200:
+            error_msg = f"2Factor API error: {response.status_code} - {response.text}"
+            category = error_category_for_status(response.status_code)
+            for item, _ in members:
+                self._fail(item, error_msg, category)
+            return
         try:
-            phone = item.recipient
-            if not phone.startswith("91") and not phone.startswith("+91"):
-                phone = "91" + phone.lstrip("+")
-            payload = {
-                "module": self.sms_type,
-                "apikey": self.api_key,
-                "to": phone,
-                "from": self.sender_id,
-                "msg": item.message
-            }
-            if self.sms_type == "TRANS_SMS" and hasattr(item, "dlt_data"):
-                dlt_data = getattr(item, "dlt_data", {})
-                if "pe_id" in dlt_data:
-                    payload["peid"] = dlt_data["pe_id"]
-                if "template_id" in dlt_data:
-                    payload["ctid"] = dlt_data["template_id"]
-            response = requests.post(self.api_url, data=payload)
-            if response.status_code == 200:
-                try:
-                    response_data = response.json()
-                    if response_data.get("Status") == "Success":
-                        item.delivery_status = "SENT"
-                        item.ext_id = str(response_data.get("Details", ""))
-                    else:
-                        error_msg = response_data.get("Details", "Unknown error")
-                        item.delivery_status = "FAILED"
-                        item.error = error_msg
-                except (ValueError, KeyError):
-                    if "Success" in response.text:
-                        item.delivery_status = "SENT"
-                        item.ext_id = "2factor_sent"
-                    else:
-                        item.delivery_status = "FAILED"
-                        item.error = f"Invalid response: {response.text}"
+            response_data = response.json()
+        except ValueError:
+            for item, _ in members:
+                if "Success" in response.text:
+                    item.delivery_status = "SENT"
+                    item.ext_id = "2factor_bulk_sent"
+                else:
+                    self._fail(item, f"Invalid response: {response.text}", ErrorCategory.SERVER.value)
+            return
+        if response_data.get("Status") != "Success":
+            error_msg = response_data.get("Details", "Unknown error")
+            for item, _ in members:
+                self._fail(item, error_msg, ErrorCategory.PROVIDER.value)
+            return
+
+        details = response_data.get("Details", "")
+        if isinstance(details, list):
+            # One entry per submitted number, in submission order
+            numbers = list(dict.fromkeys(number for _, number in members))
+            details = dict(zip(numbers, details))
+        for item, number in members:
+            if not isinstance(details, dict):
+                item.delivery_status = "SENT"
+                item.ext_id = str(details)
+                continue
+            status = details.get(number)
+            if status is None:
+                self._fail(item, "No status returned for recipient", ErrorCategory.PROVIDER.value)
+            elif isinstance(status, dict) and status.get("Status", "Success") != "Success":
+                self._fail(item, status.get("Details", "Unknown error"), ErrorCategory.PROVIDER.value)
             else:
-                error_msg = f"2Factor API error: {response.status_code} - {response.text}"
-                item.delivery_status = "FAILED"
-                item.error = error_msg
-            return item
+                item.delivery_status = "SENT"
+                item.ext_id = str(status.get("Details", "") if isinstance(status, dict) else status)
+
+    def _send_bulk_sync(self, payload: dict, members):
+        try:
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            response = timed_call(
+                self.metrics, self.provider_config.name, "bulk_sms", len(members),
+                self.session.post, self.api_url, data=self._bulk_payload(payload, members), timeout=self.timeout,
+                controller=self.adaptive)
+            self._apply_bulk_response(members, response)
+        except Exception as e:
+            for item, _ in members:
+                self._fail(item, str(e), ErrorCategory.TRANSPORT.value)
+
+    async def _send_bulk_async(self, payload: dict, members):
+        try:
+            if self.rate_limiter:
+                await self.rate_limiter.acquire_async()
+            response = await timed_request(
+                self.metrics, self.provider_config.name, "bulk_sms", len(members),
+                self.async_transport.request("POST", self.api_url, data=self._bulk_payload(payload, members)),
+                controller=self.adaptive)
+            self._apply_bulk_response(members, response)
         except Exception as e:
-            item.delivery_status = "FAILED"
-            item.error = str(e)
-            return item
+            for item, _ in members:
+                self._fail(item, str(e) or e.__class__.__name__, ErrorCategory.TRANSPORT.value)
+
+    def _send_sms_single_sync(self, item, notification=None):
+        phone = normalize_phone(item.recipient)
+        if phone is None:
+            return self._fail(item, f"Invalid phone number: {item.recipient}", ErrorCategory.CLIENT.value)
+        try:
+            payload = self._sms_payload(item, phone, notification)
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            response = timed_call(
+                self.metrics, self.provider_config.name, "sms", 1,
+                self.session.post, self.api_url, data=payload, timeout=self.timeout, controller=self.adaptive)
+            return self._apply_response(item, response, "2factor_sent")
+        except Exception as e:
+            return self._fail(item, str(e), ErrorCategory.TRANSPORT.value)
 
     def _send_otp_single_sync(self, item):
+        phone = normalize_phone(item.recipient)
+        if phone is None:
+            return self._fail(item, f"Invalid phone number: {item.recipient}", ErrorCategory.CLIENT.value)
         try:
             if not item.otp:
-                item.delivery_status = "FAILED"
-                item.error = "Missing OTP value"
-                return item
-            phone = item.recipient
-            if not phone.startswith("+"):
-                if phone.startswith("91"):
-                    phone = "+" + phone
-                else:
-                    phone = "+91" + phone.lstrip("+")
-            template_part = f"/{item.template_name}" if item.template_name else ""
-            api_url = f"{self.api_url_v1}{self.api_key}/SMS/{phone}/{item.otp}{template_part}"
-            response = requests.get(api_url, params=item.variables)
-            if response.status_code == 200:
-                try:
-                    response_data = response.json()
-                    if response_data.get("Status") == "Success":
-                        item.delivery_status = "SENT"
-                        item.ext_id = str(response_data.get("Details", ""))
-                    else:
-                        error_msg = response_data.get("Details", "Unknown error")
-                        item.delivery_status = "FAILED"
-                        item.error = error_msg
-                except (ValueError, KeyError):
-                    if "Success" in response.text:
-                        item.delivery_status = "SENT"
-                        item.ext_id = "2factor_otp_sent"
-                    else:
-                        item.delivery_status = "FAILED"
-                        item.error = f"Invalid response: {response.text}"
-            else:
-                error_msg = f"2Factor API error: {response.status_code} - {response.text}"
-                item.delivery_status = "FAILED"
-                item.error = error_msg
-            return item
+                return self._fail(item, "Missing OTP value", ErrorCategory.CLIENT.value)
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            response = timed_call(
+                self.metrics, self.provider_config.name, "otp", 1,
+                self.session.get, self._otp_url(item, phone), params=item.variables, timeout=self.timeout,
+                controller=self.adaptive)
+            return self._apply_response(item, response, "2factor_otp_sent")
+        except Exception as e:
+            return self._fail(item, str(e), ErrorCategory.TRANSPORT.value)
+
+    async def _send_sms_single_async(self, item, notification=None):
+        phone = normalize_phone(item.recipient)
+        if phone is None:
+            return self._fail(item, f"Invalid phone number: {item.recipient}", ErrorCategory.CLIENT.value)
+        try:
+            payload = self._sms_payload(item, phone, notification)
+            if self.rate_limiter:
+                await self.rate_limiter.acquire_async()
+            response = await timed_request(
+                self.metrics, self.provider_config.name, "sms", 1,
+                self.async_transport.request("POST", self.api_url, data=payload), controller=self.adaptive)
+            return self._apply_response(item, response, "2factor_sent")
+        except Exception as e:
+            return self._fail(item, str(e) or e.__class__.__name__, ErrorCategory.TRANSPORT.value)
+
+    async def _send_otp_single_async(self, item, notification=None):
+        phone = normalize_phone(item.recipient)
+        if phone is None:
+            return self._fail(item, f"Invalid phone number: {item.recipient}", ErrorCategory.CLIENT.value)
+        try:
+            if not item.otp:
+                return self._fail(item, "Missing OTP value", ErrorCategory.CLIENT.value)
+            if self.rate_limiter:
+                await self.rate_limiter.acquire_async()
+            response = await timed_request(
+                self.metrics, self.provider_config.name, "otp", 1,
+                self.async_transport.request("GET", self._otp_url(item, phone), params=item.variables),
+                controller=self.adaptive)
+            return self._apply_response(item, response, "2factor_otp_sent")
         except Exception as e:
-            item.delivery_status = "FAILED"
-            item.error = str(e)
-            return item
-
-    async def send_batch(self, items):
-        loop = asyncio.get_running_loop()
-        if self.sms_type == "OTP":
-            call = self._send_otp_single_sync
+            return self._fail(item, str(e) or e.__class__.__name__, ErrorCategory.TRANSPORT.value)
+
+    async def send_batch(self, items, notification=None):
+        if sms_module(notification) == "OTP":
+            call = self._send_otp_single_async
         else:
-            call = self._send_sms_single_sync
-        tasks = [loop.run_in_executor(None, functools.partial(call, item)) for item in items]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+            call = self._send_sms_single_async
+        # In-flight requests are bounded by the transport's semaphore, not by the batch size
+        results = await asyncio.gather(*(call(item, notification) for item in items), return_exceptions=True)
         normalized = []
         for item, result in zip(items, results):
             if isinstance(result, Exception):
-                item.delivery_status = "FAILED"
-                item.error = str(result)
-                normalized.append(item)
+                normalized.append(self._fail(item, str(result), ErrorCategory.TRANSPORT.value))
             else:
                 normalized.append(result)
         return normalized
 
     async def async_send(self, notification):
-        if notification.message_type == MessageType.TRANSACTIONAL.value:
-            self.sms_type = "TRANS_SMS"
-        elif notification.message_type == MessageType.PROMOTIONAL.value:
-            self.sms_type = "PROMO_SMS"
-        else:
-            self.sms_type = "OTP"
-        all_results = []
+        if self.bulk_sms and sms_module(notification) != "OTP":
+            await asyncio.gather(*(self._send_bulk_async(payload, members)
+                                   for payload, members in self._bulk_chunks(notification.items, notification)))
+            return notification
+        # Results are written onto the items themselves, so the list is never rebuilt
+        if self.adaptive:
+            await self._send_window(notification)
+            return notification
         for i in range(0, len(notification.items), self.batch_size):
-            batch = notification.items[i:i + self.batch_size]
-            batch_results = await self.send_batch(batch)
-            all_results.extend(batch_results)
-        notification.items = all_results
-        return notification
\ No newline at end of file
+            await self.send_batch(notification.items[i:i + self.batch_size], notification)
+        return notification
+
+    async def _send_window(self, notification):
+        # Sliding window instead of fixed batches: a finished send is replaced at once, so the
+        # controller's concurrency stays in flight and its latency samples never include queueing
+        call = self._send_otp_single_async if sms_module(notification) == "OTP" else self._send_sms_single_async
+        pending = set()
+        for item in notification.items:
+            while len(pending) >= max(1, self.adaptive.concurrency):
+                _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            pending.add(asyncio.ensure_future(self._guarded(call, item, notification)))
+        if pending:
+            await asyncio.wait(pending)
+
+    async def _guarded(self, call, item, notification):
+        try:
+            return await call(item, notification)
+        except Exception as e:
+            return self._fail(item, str(e) or e.__class__.__name__, ErrorCategory.TRANSPORT.value)
+
+
+def _first(report: dict, *keys):
+    for key in keys:
+        if report.get(key) is not None:
+            return report[key]
+    return None
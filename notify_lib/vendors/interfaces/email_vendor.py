@@ -1,7 +1,12 @@
 from abc import ABC, abstractmethod
 
+from notify_lib.metrics import NULL_METRICS
+
 
 class EmailVendor(ABC):
+    metrics = NULL_METRICS
+    # AdaptiveController of vendors configured with `adaptive`
+    adaptive = None
 
     @abstractmethod
     def send(self, notification) -> str:
@@ -9,4 +14,13 @@ class EmailVendor(ABC):
 
     @abstractmethod
     async def async_send(self, notification) -> str:
-        pass
\ No newline at end of file
+        pass
+
+    def adopt_state(self, previous):
+        # Called on reload with the instance this one replaces, to take over its connection
+        # pools and other runtime state
+        pass
+
+    def delivery_reports(self, payload) -> list:
+        # Parses a delivery-report webhook body into DeliveryReports; vendors without one report nothing
+        return []
@@ -1,6 +1,11 @@
 from abc import ABC, abstractmethod
 
+from notify_lib.metrics import NULL_METRICS
+
 class SmsVendor(ABC):
+    metrics = NULL_METRICS
+    # AdaptiveController of vendors configured with `adaptive`
+    adaptive = None
 
     @abstractmethod
     def send(self, notification) -> str:
@@ -11,4 +16,13 @@ class SmsVendor(ABC):
         pass
 
     def supports_otp(self) -> bool:
-        return False
\ No newline at end of file
+        return False
+
+    def adopt_state(self, previous):
+        # Called on reload with the instance this one replaces, to take over its connection
+        # pools and other runtime state
+        pass
+
+    def delivery_reports(self, payload) -> list:
+        # Parses a delivery-report webhook body into DeliveryReports; vendors without one report nothing
+        return []
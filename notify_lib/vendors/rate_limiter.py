@@ -0,0 +1,53 @@
+import asyncio
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+class TokenBucket:
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: int) -> float:
+        # Tokens may go negative: each caller reserves its slot and waits for the
+        # refill to catch up, so threads and event loops share one fair queue
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= tokens
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self, tokens: int = 1):
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int = 1):
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+_buckets: Dict[Tuple, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def shared_bucket(key: Tuple, rate: Optional[float], burst: Optional[int] = None) -> Optional[TokenBucket]:
+    # Vendors configured for the same provider account share one bucket per process
+    if not rate:
+        return None
+    burst = burst or max(1, int(rate))
+    with _buckets_lock:
+        bucket = _buckets.get(key)
+        if bucket is None or bucket.rate != rate or bucket.burst != burst:
+            bucket = TokenBucket(rate, burst)
+            _buckets[key] = bucket
+        return bucket
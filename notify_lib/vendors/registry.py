@@ -0,0 +1,69 @@
+import importlib
+import threading
+from typing import Dict, Tuple, Union
+
+from notify_lib.constants import Channel, Provider
+
+# Third-party vendors are published as entry points named "<channel>.<provider>", e.g.
+#   [project.entry-points."notify_lib.vendors"]
+#   "sms.msg91" = "notify_msg91.vendor:Msg91"
+ENTRY_POINT_GROUP = "notify_lib.vendors"
+
+# Vendors are stored as "module:attribute" paths and only imported on first use, so a
+# process never pays for the HTTP clients and SDKs of providers it is not configured for
+_vendors: Dict[Tuple[str, str], Union[str, type]] = {
+    (Channel.SMS.value, Provider.TWOFACTOR.value): "notify_lib.vendors.implementations.sms.twofactor:TwoFactor",
+    (Channel.EMAIL.value, Provider.SENDGRID.value):
+        "notify_lib.vendors.implementations.email.sendgrid:SendGridEmail",
+}
+_lock = threading.Lock()
+_entry_points_loaded = False
+
+
+def register_vendor(channel: str, name: str, vendor: Union[str, type]):
+    # `vendor` is the class itself or its "module:attribute" path
+    with _lock:
+        _vendors[(channel, name)] = vendor
+
+
+def registered_vendors(channel: str):
+    _load_entry_points()
+    return sorted(name for vendor_channel, name in _vendors if vendor_channel == channel)
+
+
+def get_vendor_class(channel: str, name: str) -> type:
+    key = (channel, name)
+    vendor = _vendors.get(key)
+    if vendor is None:
+        _load_entry_points()
+        vendor = _vendors.get(key)
+    if vendor is None:
+        raise ValueError(f"Unknown Vendor {name} for channel {channel}")
+    if isinstance(vendor, str):
+        vendor = _import(vendor)
+        with _lock:
+            _vendors[key] = vendor
+    return vendor
+
+
+def _import(path: str) -> type:
+    module_name, _, attribute = path.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def _load_entry_points():
+    # Only scanned when a name is not registered yet; built-in providers never trigger it
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    from importlib.metadata import entry_points
+
+    try:
+        found = entry_points(group=ENTRY_POINT_GROUP)
+    except TypeError:
+        found = entry_points().get(ENTRY_POINT_GROUP, [])
+    with _lock:
+        for entry_point in found:
+            channel, _, name = entry_point.name.partition(".")
+            _vendors.setdefault((channel, name), entry_point.value)
+        _entry_points_loaded = True
@@ -0,0 +1,198 @@
+import asyncio
+import functools
+import json
+import time
+import weakref
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from notify_lib.constants import ErrorCategory
+
+
+def build_session(pool_size: int) -> requests.Session:
+    # One adapter per scheme so keep-alive connections are reused across calls
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def error_category_for_status(status_code: int) -> str:
+    if status_code == 429:
+        return ErrorCategory.THROTTLED.value
+    if status_code >= 500:
+        return ErrorCategory.SERVER.value
+    return ErrorCategory.CLIENT.value
+
+
+def timed_call(metrics, vendor: str, operation: str, items: int, call, *args, controller=None, **kwargs):
+    # Times one provider HTTP call for the metrics sink and the vendor's adaptive controller;
+    # with neither, it costs a single attribute check
+    if not metrics.enabled and controller is None:
+        return call(*args, **kwargs)
+    started = time.perf_counter()
+    try:
+        response = call(*args, **kwargs)
+    except Exception as e:
+        status_code = getattr(e, "status_code", None)
+        _observed(
+            metrics, controller, vendor, operation, items, time.perf_counter() - started,
+            status_code or e.__class__.__name__)
+        raise
+    _observed(metrics, controller, vendor, operation, items, time.perf_counter() - started, response.status_code)
+    return response
+
+
+async def timed_request(metrics, vendor: str, operation: str, items: int, request, controller=None):
+    # `request` is an AsyncTransport.request call, which times itself once past its concurrency
+    # gate, so time spent queued never counts as provider latency
+    if not metrics.enabled and controller is None:
+        return await request
+    started = time.perf_counter()
+    try:
+        response = await request
+    except Exception as e:
+        elapsed = getattr(e, "request_seconds", None)
+        _observed(
+            metrics, controller, vendor, operation, items,
+            time.perf_counter() - started if elapsed is None else elapsed, e.__class__.__name__)
+        raise
+    elapsed = response.elapsed if response.elapsed is not None else time.perf_counter() - started
+    _observed(metrics, controller, vendor, operation, items, elapsed, response.status_code)
+    return response
+
+
+def _observed(metrics, controller, vendor, operation, items, elapsed, outcome):
+    metrics.record_request(vendor, operation, elapsed, outcome, items)
+    if controller is not None:
+        controller.record(elapsed, outcome if isinstance(outcome, int) else None)
+
+
+def adopt_transport_state(vendor, previous):
+    # Reload support shared by the HTTP vendors: the replacement keeps the previous instance's
+    # adaptive setpoints, connection pools and rate-limit bucket wherever the settings each
+    # was built from are unchanged, so a rotated key or new priority costs no reconnects
+    old, new = previous.provider_config, vendor.provider_config
+    if previous.adaptive is not None and (old.adaptive, old.max_concurrency) == (new.adaptive, new.max_concurrency):
+        vendor.adaptive = previous.adaptive
+    if ((old.timeout, old.pool_size, old.max_concurrency) == (new.timeout, new.pool_size, new.max_concurrency)
+            and (previous.adaptive is None) == (vendor.adaptive is None)):
+        fresh = vendor.async_transport
+        if fresh.session is not None:
+            fresh.session.close()
+        transport = previous.async_transport
+        transport.limit = fresh.limit
+        vendor.async_transport = transport
+        if hasattr(vendor, "session"):
+            vendor.session = previous.session
+    if previous.rate_limiter is not None and (old.rate_limit, old.rate_burst) == (new.rate_limit, new.rate_burst):
+        vendor.rate_limiter = previous.rate_limiter
+
+
+class HttpResponse:
+
+    def __init__(self, status_code: int, text: str, headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+        # Seconds from passing the transport's gate to the full response
+        self.elapsed = None
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class AsyncTransport:
+
+    def __init__(self, timeout: int, max_concurrency: int, session: requests.Session = None, limit=None):
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.session = session
+        # Optional callable returning the current in-flight limit, e.g. an adaptive controller's setpoint
+        self.limit = limit
+        # aiohttp sessions and semaphores are bound to the loop they were created on
+        self._loop_state = weakref.WeakKeyDictionary()
+        # aiohttp is imported on first async use, so sync-only processes never load it
+        self.aiohttp = None
+        self._aiohttp_checked = False
+
+    def _import_aiohttp(self):
+        if not self._aiohttp_checked:
+            try:
+                import aiohttp
+                self.aiohttp = aiohttp
+            except ImportError:
+                self.aiohttp = None
+            self._aiohttp_checked = True
+
+    async def _state(self):
+        loop = asyncio.get_running_loop()
+        state = self._loop_state.get(loop)
+        if state is None:
+            self._import_aiohttp()
+            client = None
+            if self.aiohttp:
+                client = self.aiohttp.ClientSession(
+                    timeout=self.aiohttp.ClientTimeout(total=self.timeout),
+                    connector=self.aiohttp.TCPConnector(limit=self.max_concurrency))
+            if self.limit is not None:
+                from notify_lib.vendors.adaptive import AdaptiveGate
+                # Read through the transport, so a vendor adopting it on reload can repoint the limit
+                gate = AdaptiveGate(lambda: self.limit())
+            else:
+                gate = asyncio.Semaphore(self.max_concurrency)
+            closer = _close_on_shutdown(client) if client is not None else None
+            state = (gate, client, closer)
+            self._loop_state[loop] = state
+            if closer is not None:
+                # Started on this loop, so the loop's shutdown_asyncgens (asyncio.run runs it) closes
+                # the session even when the caller never awaits aclose
+                await closer.__anext__()
+        return state
+
+    async def request(self, method: str, url: str, params=None, data=None, json=None, headers=None) -> HttpResponse:
+        semaphore, client, _ = await self._state()
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await self._send(client, method, url, params, data, json, headers)
+            except Exception as e:
+                e.request_seconds = time.perf_counter() - started
+                raise
+            response.elapsed = time.perf_counter() - started
+            return response
+
+    async def _send(self, client, method, url, params, data, json, headers) -> HttpResponse:
+        if client is None:
+            # Without aiohttp fall back to the pooled sync session, still bounded by the semaphore
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(None, functools.partial(
+                self.session.request, method, url,
+                params=params, data=data, json=json, headers=headers, timeout=self.timeout))
+            return HttpResponse(response.status_code, response.text, response.headers)
+        async with client.request(method, url, params=params, data=data, json=json, headers=headers) as response:
+            text = await response.text()
+            return HttpResponse(response.status, text, response.headers)
+
+    async def aclose(self):
+        loop = asyncio.get_running_loop()
+        state = self._loop_state.pop(loop, None)
+        if state is not None and state[2] is not None:
+            await state[2].aclose()
+
+    def close(self):
+        # Closes the session of every loop still running, on that loop; sessions of loops that
+        # are not running close when the loop shuts down
+        for loop, (_, _, closer) in list(self._loop_state.items()):
+            if closer is not None and loop.is_running():
+                asyncio.run_coroutine_threadsafe(closer.aclose(), loop)
+        self._loop_state.clear()
+
+
+async def _close_on_shutdown(client):
+    try:
+        yield
+    finally:
+        await client.close()
@@ -1,34 +1,48 @@
+from typing import Iterable, List
+
 from notify_lib.config import NotifyConfig
-from notify_lib.constants import Provider, Channel
-from notify_lib.vendors.implementations.email.sendgrid import SendGridEmail
-from notify_lib.vendors.implementations.sms.twofactor import TwoFactor
+from notify_lib.constants import Channel
+from notify_lib.vendors.registry import get_vendor_class
+
+
+def account_names(names: Iterable[str]) -> List[str]:
+    # Tells apart several accounts of one provider, in priority order: the first keeps the provider
+    # name and the n-th becomes "<name>#<n>". This is how a provider is matched across a reload
+    seen = {}
+    accounts = []
+    for name in names:
+        seen[name] = seen.get(name, 0) + 1
+        accounts.append(name if seen[name] == 1 else f"{name}#{seen[name]}")
+    return accounts
 
 
 class VendorFactory:
 
     @staticmethod
-    def get_vendors(channel: Channel, config: NotifyConfig):
+    def get_vendors(channel: Channel, config: NotifyConfig, previous=None):
+        # `previous` are the vendors of the service being reloaded: one whose provider config is
+        # unchanged is reused as is, and a rebuilt one takes over the old instance's state
         if channel == Channel.SMS.value:
-            sms_providers = config.sms.providers
-            if not sms_providers:
-                raise ValueError(f"No vendor configured for channel {channel}")
-            sms_providers.sort(key = lambda x: x.priority)
-            vendor_lst = []
-            for e in sms_providers:
-                if e.name == Provider.TWOFACTOR.value:
-                    vendor_lst.append(TwoFactor(e.credentials))
-                else:
-                    raise ValueError(f"Unknown Vendor {e.name} for channel {channel}")
-            return vendor_lst
+            providers = config.sms.providers
         elif channel == Channel.EMAIL.value:
-            email_providers = config.email.providers
-            if not email_providers:
-                raise ValueError(f"No vendor configured for channel {channel}")
-            email_providers.sort(key = lambda x: x.priority)
-            vendor_lst = []
-            for e in email_providers:
-                if e.name == Provider.SENDGRID.value:
-                    vendor_lst.append(SendGridEmail(e.credentials))
-                else:
-                    raise ValueError(f"Unknown Vendor {e.name} for channel {channel}")
-            return vendor_lst
+            providers = config.email.providers
+        else:
+            raise ValueError(f"Unknown Channel: {channel}")
+        if not providers:
+            raise ValueError(f"No vendor configured for channel {channel}")
+        providers.sort(key = lambda x: x.priority)
+        if not previous:
+            return [get_vendor_class(channel, e.name)(e.credentials, e) for e in providers]
+        previous = [v for v in previous if getattr(v, "provider_config", None) is not None]
+        by_account = dict(zip(account_names(v.provider_config.name for v in previous), previous))
+        vendors = []
+        for account, e in zip(account_names(e.name for e in providers), providers):
+            old = by_account.get(account)
+            if old is not None and old.provider_config == e:
+                vendors.append(old)
+                continue
+            vendor = get_vendor_class(channel, e.name)(e.credentials, e)
+            if old is not None and type(old) is type(vendor):
+                vendor.adopt_state(old)
+            vendors.append(vendor)
+        return vendors
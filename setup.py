@@ -9,6 +9,9 @@ setup(
     install_requires=[
         "requests>=2.31.0", "sendgrid~=6.11.0"
     ],
+    extras_require={
+        "async": ["aiohttp>=3.8"],
+    },
     description="A helper library, which provides multiple notification support",
     license='MIT',
     long_description=open('README.md').read(),
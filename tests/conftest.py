@@ -0,0 +1,46 @@
+import os
+import sys
+
+import pytest
+
+# The stand-in server lives in benchmarks/, beside the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.standin import StandinServer  # noqa: E402
+from notify_lib.models.items import SmsItem  # noqa: E402
+from notify_lib.models.notifications import SmsNotification  # noqa: E402
+
+
+@pytest.fixture
+def standin():
+    server = StandinServer(latency=0.002, seed=7).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def provider(standin):
+    # Builds a ProviderConfig dict for `name` aimed at the stand-in server
+    def build(name, **overrides):
+        credentials = {"api_key": "key"}
+        if name == "sendgrid":
+            credentials["from_email"] = "sender@example.com"
+        config = {"name": name, "credentials": credentials, "max_retries": 0, "options": standin.provider_options()}
+        options = overrides.pop("options", {})
+        config.update(overrides)
+        config["options"].update(options)
+        return config
+
+    return build
+
+
+@pytest.fixture
+def sms():
+    # Builds an SmsNotification of `count` items numbered from `start`; `fields` go to the notification
+    def build(count=1, start=0, **fields):
+        notification = SmsNotification(**dict({"sender_id": "NOTIFY"}, **fields))
+        for i in range(start, start + count):
+            notification.add_item(SmsItem(f"98765{i:05d}", "hello"))
+        return notification
+
+    return build
@@ -0,0 +1,99 @@
+import asyncio
+
+from notify_lib.client import NotificationClient
+from notify_lib.models.items import EmailItem, SmsItem
+from notify_lib.models.notifications import EmailNotification, SmsNotification
+from notify_lib.vendors.adaptive import AdaptiveGate
+
+
+def test_healthy_provider_keeps_concurrency_at_ceiling(provider):
+    # Many more batches than the gate admits: time spent queued must not read as congestion
+    adaptive = {"target_latency": 0.1, "max_batch_size": 10}
+    client = NotificationClient({
+        "sms": {"providers": [provider("twofactor", max_concurrency=4, adaptive=adaptive)]},
+        "email": {"providers": [provider("sendgrid", max_concurrency=4, adaptive=adaptive)]},
+    })
+    sms = SmsNotification(sender_id="NOTIFY")
+    for i in range(400):
+        sms.add_item(SmsItem(f"98765{i:05d}", "hello"))
+    email = EmailNotification()
+    for i in range(600):
+        email.add_item(EmailItem(f"user{i}@example.com", "hello", subject="hi"))
+
+    async def send():
+        try:
+            return await client.sms.async_process(sms), await client.email.async_process(email)
+        finally:
+            await client.sms.aclose()
+            await client.email.aclose()
+
+    asyncio.run(send())
+    assert all(item.delivery_status == "SENT" for item in sms.items)
+    assert all(item.delivery_status == "SENT" for item in email.items)
+    for service in (client.sms, client.email):
+        (setpoints,) = service.vendor_setpoints().values()
+        assert setpoints["decreases"] == 0
+        assert setpoints["concurrency"] == 4
+        assert setpoints["batch_size"] == 10
+
+
+def test_throttling_backs_off(standin, provider):
+    standin.throttle_rate = 0.5
+    client = NotificationClient({"sms": {"providers": [
+        provider("twofactor", max_concurrency=8, adaptive={"target_latency": 0.01})]}})
+    notification = SmsNotification(sender_id="NOTIFY")
+    for i in range(200):
+        notification.add_item(SmsItem(f"98765{i:05d}", "hello"))
+    client.sms.process(notification)
+    (setpoints,) = client.sms.vendor_setpoints().values()
+    assert setpoints["decreases"] >= 1
+    assert setpoints["concurrency"] < 8
+
+
+def test_gate_passes_on_the_slot_of_a_cancelled_waiter():
+    async def run():
+        gate = AdaptiveGate(lambda: 1)
+        entered = []
+
+        async def enter(name):
+            async with gate:
+                entered.append(name)
+                await asyncio.sleep(0.01)
+
+        await gate.__aenter__()
+        woken, next_waiter = asyncio.ensure_future(enter("woken")), asyncio.ensure_future(enter("next"))
+        await asyncio.sleep(0)
+        await gate.__aexit__(None, None, None)
+        # Cancelled after the release woke it, before it could resume
+        woken.cancel()
+        await asyncio.wait_for(next_waiter, 1)
+        return entered
+
+    assert asyncio.run(run()) == ["next"]
+
+
+def test_gate_admits_waiters_when_the_limit_grows():
+    async def run():
+        limit = [1]
+        gate = AdaptiveGate(lambda: limit[0])
+        release = asyncio.Event()
+        entered = []
+
+        async def enter(name):
+            async with gate:
+                entered.append(name)
+                await release.wait()
+
+        tasks = [asyncio.ensure_future(enter(i)) for i in range(4)]
+        await asyncio.sleep(0.01)
+        assert entered == [0]
+        limit[0] = 3
+        # The next acquire sees the larger limit and wakes waiters into the new slots
+        tasks.append(asyncio.ensure_future(enter(4)))
+        await asyncio.sleep(0.01)
+        assert len(entered) == 3
+        release.set()
+        await asyncio.gather(*tasks)
+        return entered
+
+    assert sorted(asyncio.run(run())) == [0, 1, 2, 3, 4]
@@ -0,0 +1,50 @@
+import time
+
+from benchmarks.standin import StandinServer
+from notify_lib.client import NotificationClient
+from notify_lib.models.items import SmsItem
+from notify_lib.models.notifications import SmsNotification
+from notify_lib.services.circuit_breaker import CircuitBreaker
+
+
+def test_opens_at_threshold_and_probes_once_after_recovery():
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    assert not breaker.available()
+    time.sleep(0.06)
+    assert breaker.available()
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Only one probe at a time
+    assert not breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+
+
+def test_open_breaker_fails_over_to_the_next_provider(standin, provider):
+    broken = StandinServer(error_rate=1.0, seed=1).start()
+    try:
+        client = NotificationClient({"sms": {"providers": [
+            dict(provider("twofactor", failure_threshold=2, recovery_timeout=60), options=broken.provider_options()),
+            provider("twofactor", priority=2, credentials={"api_key": "backup"}),
+        ]}})
+        for i in range(4):
+            notification = SmsNotification(sender_id="NOTIFY").add_item(SmsItem(f"98765{i:05d}", "hello"))
+            client.sms.process(notification)
+            assert notification.items[0].delivery_status == "SENT"
+        primary, _ = client.sms.vendors
+        assert client.sms.breakers[primary].state == CircuitBreaker.OPEN
+        # Once open, the failing provider is skipped without a request
+        assert broken.requests == 2
+        assert standin.requests == 4
+    finally:
+        broken.stop()
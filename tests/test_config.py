@@ -0,0 +1,28 @@
+import pytest
+
+from notify_lib.config import load_notify_config
+
+
+def sms(**provider):
+    return {"sms": {"providers": [dict({"name": "twofactor", "credentials": {"api_key": "key"}}, **provider)]}}
+
+
+@pytest.mark.parametrize("value", [0, -5, "100", 2.5, None])
+def test_bulk_chunk_size_must_be_a_positive_integer(value):
+    with pytest.raises(ValueError, match="bulk_chunk_size"):
+        load_notify_config(sms(options={"bulk_sms": True, "bulk_chunk_size": value}))
+
+
+def test_bulk_chunk_size_is_optional():
+    assert load_notify_config(sms(options={"bulk_sms": True})).sms.providers[0].options == {"bulk_sms": True}
+    config = load_notify_config(sms(options={"bulk_chunk_size": 200}))
+    assert config.sms.providers[0].options["bulk_chunk_size"] == 200
+
+
+@pytest.mark.parametrize("section, values, message", [
+    ("outbox", {"lease_timeout": 0}, "lease_timeout"),
+    ("idempotency", {"reservation_ttl": -1}, "reservation_ttl"),
+])
+def test_store_timeouts_are_validated(section, values, message):
+    with pytest.raises(ValueError, match=message):
+        load_notify_config(dict(sms(), **{section: values}))
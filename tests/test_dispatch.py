@@ -0,0 +1,33 @@
+import threading
+
+from notify_lib.client import NotificationClient
+
+
+def weighted_client(provider, send_workers=2):
+    return NotificationClient({"sms": {"dispatch": "weighted", "send_workers": send_workers, "providers": [
+        provider("twofactor", weight=3, credentials={"api_key": "first"}),
+        provider("twofactor", priority=2, credentials={"api_key": "second"}),
+    ]}})
+
+
+def test_shards_split_by_weight_on_the_shared_pool(provider, sms):
+    client = weighted_client(provider)
+    notification = client.sms.process(sms(8))
+    assert [item.delivery_status for item in notification.items] == ["SENT"] * 8
+    first, second = client.sms.vendors
+    assert set(client.sms.latencies) == {first, second}
+    # One shard ran on the caller, the other on the service's pool, which is reused
+    pool = client.sms._executor
+    assert pool is not None
+    client.sms.process(sms(8, 8))
+    assert client.sms._executor is pool
+
+
+def test_send_many_with_shards_does_not_deadlock(provider, sms):
+    client = weighted_client(provider, send_workers=2)
+    results = []
+    sending = threading.Thread(target=lambda: results.extend(client.sms.send_many([sms(4, i * 4) for i in range(10)])))
+    sending.start()
+    sending.join(10)
+    assert not sending.is_alive()
+    assert sum(item.delivery_status == "SENT" for result in results for item in result.items) == 40
@@ -0,0 +1,108 @@
+import threading
+
+import pytest
+
+from notify_lib.client import NotificationClient
+from notify_lib.idempotency import IN_FLIGHT, IdempotencyStore, MemoryIdempotencyStore, SqliteIdempotencyStore
+from notify_lib.models.items import SmsItem
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        store = MemoryIdempotencyStore(ttl=60)
+    else:
+        store = SqliteIdempotencyStore(ttl=60, path=str(tmp_path / "idempotency.db"))
+    yield store
+    store.close()
+
+
+def test_store_is_abstract():
+    with pytest.raises(TypeError):
+        IdempotencyStore(ttl=60)
+
+
+def test_reserve_put_and_release(store):
+    assert store.reserve_many(["a", "b"]) == {}
+    assert store.reserve_many(["a", "c"]) == {"a": IN_FLIGHT}
+    store.put_many({"a": "ext-a"})
+    store.release_many(["b", "c"])
+    assert store.get_many(["a", "b", "c"]) == {"a": "ext-a"}
+    assert store.reserve_many(["a", "b"]) == {"a": "ext-a"}
+    # Releasing never drops a delivered key
+    store.release_many(["a"])
+    assert store.get_many(["a"]) == {"a": "ext-a"}
+
+
+def test_lapsed_reservation_can_be_taken_again(tmp_path):
+    store = MemoryIdempotencyStore(ttl=60, reservation_ttl=0.01)
+    store.reserve_many(["a"])
+    threading.Event().wait(0.02)
+    assert store.reserve_many(["a"]) == {}
+
+
+def client_for(provider, **idempotency):
+    return NotificationClient({
+        "sms": {"providers": [provider("twofactor")]},
+        "idempotency": dict({"ttl": 60}, **idempotency),
+    })
+
+
+def test_repeated_send_is_suppressed(standin, provider, sms):
+    client = client_for(provider)
+    first = client.sms.process(sms(3, identifier="order-1"))
+    sent = standin.requests
+    second = client.sms.process(sms(3, identifier="order-1"))
+    assert standin.requests == sent
+    assert [item.ext_id for item in second.items] == [item.ext_id for item in first.items]
+    assert all(item.delivery_status == "SENT" for item in second.items)
+
+
+def test_failed_send_releases_its_reservations(standin, provider, sms):
+    client = client_for(provider)
+    send = client.sms.send
+
+    def broken(batch):
+        raise ConnectionError("provider down")
+
+    client.sms.send = broken
+    with pytest.raises(ConnectionError):
+        client.sms.process(sms(3, identifier="order-1"))
+    client.sms.send = send
+    retried = client.sms.process(sms(3, identifier="order-1"))
+    assert all(item.delivery_status == "SENT" for item in retried.items)
+
+
+def test_concurrent_duplicates_are_sent_once(standin, provider, tmp_path, sms):
+    standin.latency = 0.05
+    client = client_for(provider, backend="sqlite", path=str(tmp_path / "idempotency.db"))
+    barrier = threading.Barrier(2)
+    results = []
+
+    def send():
+        barrier.wait()
+        results.append(client.sms.process(sms(5, identifier="order-1")))
+
+    threads = [threading.Thread(target=send) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert standin.requests == 5
+    statuses = sorted(item.delivery_status for result in results for item in result.items)
+    assert statuses == ["REJECTED"] * 5 + ["SENT"] * 5
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_repeats_within_one_notification_are_sent_once(standin, provider, tmp_path, backend, sms):
+    client = client_for(provider, backend=backend, path=str(tmp_path / "idempotency.db"))
+    repeated = sms(2, identifier="order-1")
+    repeated.add_item(SmsItem("9876500000", "hello"))
+    result = client.sms.process(repeated)
+    assert standin.requests == 2
+    assert [item.delivery_status for item in result.items] == ["SENT"] * 3
+    assert result.items[2].ext_id == result.items[0].ext_id
+    # The key was settled, not left reserved
+    again = client.sms.process(sms(identifier="order-1"))
+    assert standin.requests == 2
+    assert again.items[0].ext_id == result.items[0].ext_id
@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+
+from notify_lib.client import NotificationClient
+from notify_lib.metrics import BATCH_SIZE, ITEMS, REQUEST_SECONDS, REQUESTS, InMemoryMetrics, MetricsSink
+from notify_lib.models.items import SmsItem
+from notify_lib.models.notifications import SmsNotification
+
+
+def test_sink_is_abstract():
+    with pytest.raises(TypeError):
+        MetricsSink()
+
+
+def test_request_latency_excludes_time_queued(standin, provider):
+    # One request in flight at a time: twenty requests take twenty round trips, each timed alone
+    standin.latency = 0.03
+    metrics = InMemoryMetrics()
+    client = NotificationClient({"sms": {"providers": [provider("twofactor", max_concurrency=1)]}}, metrics)
+    notification = SmsNotification(sender_id="NOTIFY")
+    for i in range(20):
+        notification.add_item(SmsItem(f"98765{i:05d}", "hello"))
+
+    async def send():
+        try:
+            await client.sms.async_process(notification)
+        finally:
+            await client.sms.aclose()
+
+    asyncio.run(send())
+    labels = {"vendor": "twofactor", "operation": "sms"}
+    assert metrics.counter(REQUESTS, outcome="200", **labels) == 20
+    assert metrics.quantile(REQUEST_SECONDS, 1.0, **labels) <= 0.25
+    assert metrics.quantile(BATCH_SIZE, 1.0, **labels) == 1
+    assert metrics.counter(ITEMS, channel="sms", status="SENT") == 20
@@ -0,0 +1,137 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from notify_lib.client import NotificationClient
+from notify_lib.config import OutboxConfig
+from notify_lib.models.notifications import SmsNotification
+from notify_lib.outbox import DONE, PENDING, PROCESSING, Outbox
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_scheduled_notification_is_sent_once_due(tmp_path, provider, sms):
+    client = NotificationClient({
+        "outbox": {"path": str(tmp_path / "outbox.db"), "poll_interval": 0.01},
+        "sms": {"providers": [provider("twofactor")]},
+    })
+    row_id = client.sms.schedule(sms(), time.time() + 0.2)
+    assert client.sms.outbox.get(row_id)["status"] == PENDING
+    wait_for(lambda: client.sms.outbox.get(row_id)["status"] == DONE)
+    assert client.sms.outbox.get(row_id)["notification"].items[0].delivery_status == "SENT"
+    client.sms.outbox.close()
+
+
+def test_failed_group_does_not_resend_groups_already_sent(tmp_path, provider, sms):
+    client = NotificationClient({
+        "outbox": {"path": str(tmp_path / "outbox.db"), "poll_interval": 0.01},
+        "sms": {"providers": [provider("twofactor")]},
+    })
+    service = client.sms
+    send = service.send
+    sent = []
+
+    def failing_send(notification):
+        if notification.sender_id == "BROKEN":
+            raise ConnectionError("provider down")
+        sent.append(len(notification.items))
+        return send(notification)
+
+    service.send = failing_send
+    results = service.process_due([sms(2), sms(1, 2, sender_id="BROKEN"), sms(1, 3)])
+    assert sent == [3]
+    assert isinstance(results[1], ConnectionError)
+    assert results[0].items[0].delivery_status == "SENT"
+    assert results[2].items[0].delivery_status == "SENT"
+    service.outbox.close()
+
+
+def test_only_failed_rows_are_released(tmp_path, sms):
+    outbox = Outbox(OutboxConfig(path=str(tmp_path / "outbox.db"), poll_interval=0.01, retry_delay=60))
+    first = outbox.put("sms", sms())
+    second = outbox.put("sms", sms(sender_id="BROKEN"))
+    calls = []
+
+    def handler(notifications):
+        calls.append(len(notifications))
+        return [ValueError("rejected") if n.sender_id == "BROKEN" else n for n in notifications]
+
+    outbox.register("sms", handler)
+    wait_for(lambda: outbox.get(second)["error"] is not None)
+    outbox.close()
+    assert calls == [2]
+    assert outbox.get(first)["status"] == DONE
+    assert outbox.get(second)["status"] == PENDING
+    assert outbox.get(second)["error"] == "rejected"
+
+
+def test_payload_round_trips_as_json(tmp_path, sms):
+    outbox = Outbox(OutboxConfig(path=str(tmp_path / "outbox.db")))
+    notification = sms(2)
+    notification.items[0].dlt_data = {"template_id": "1007"}
+    row_id = outbox.put("sms", notification)
+    (payload,) = outbox._execute("SELECT payload FROM outbox WHERE id = ?", (row_id,))[0]
+    assert json.loads(payload)["kind"] == "sms"
+    stored = outbox.get(row_id)["notification"]
+    assert isinstance(stored, SmsNotification)
+    assert stored.identifier == notification.identifier
+    assert stored.sender_id == "NOTIFY"
+    assert [item.recipient for item in stored.items] == ["9876500000", "9876500001"]
+    assert stored.items[0].dlt_data == {"template_id": "1007"}
+    assert stored.items[1].otp is None
+
+
+def test_unserializable_notification_is_rejected(tmp_path, sms):
+    outbox = Outbox(OutboxConfig(path=str(tmp_path / "outbox.db")))
+    notification = sms()
+    notification.callback = object()
+    with pytest.raises(ValueError):
+        outbox.put("sms", notification)
+
+
+def test_only_expired_leases_are_reclaimed(tmp_path, sms):
+    path = str(tmp_path / "outbox.db")
+    crashed = Outbox(OutboxConfig(path=path, lease_timeout=0.2))
+    expired = crashed.put("sms", sms())
+    stalled = threading.Event()
+    crashed.register("sms", lambda notifications: stalled.wait() and [ValueError("stalled")] * len(notifications))
+    wait_for(lambda: crashed.get(expired)["status"] == PROCESSING)
+
+    live = Outbox(OutboxConfig(path=path, lease_timeout=60))
+    held = live.put("sms", sms())
+    with live._lock:
+        live._conn.execute(
+            "UPDATE outbox SET status = ?, owner = ?, lease_until = ? WHERE id = ?",
+            (PROCESSING, "other-host:1:abcd", time.time() + 60, held))
+    sent = []
+    live.register("sms", lambda notifications: sent.extend(notifications) or notifications)
+    wait_for(lambda: live.get(expired)["status"] == DONE)
+    live.close()
+    # The stalled worker lost its lease, so its late result does not overwrite the row
+    stalled.set()
+    crashed.close()
+    assert live.get(expired)["status"] == DONE
+    assert live.get(held)["status"] == PROCESSING
+    assert [n.identifier for n in sent] == [crashed.get(expired)["notification"].identifier]
+
+
+def test_schedule_rejects_naive_datetimes(tmp_path, provider, sms):
+    client = NotificationClient({
+        "outbox": {"path": str(tmp_path / "outbox.db")},
+        "sms": {"providers": [provider("twofactor")]},
+    })
+    with pytest.raises(ValueError, match="timezone-aware"):
+        client.sms.schedule(sms(), datetime.now())
+    later = datetime.now(timezone.utc) + timedelta(hours=1)
+    row_id = client.sms.schedule(sms(), later)
+    (available_at,) = client.sms.outbox._execute("SELECT available_at FROM outbox WHERE id = ?", (row_id,))[0]
+    assert available_at == later.timestamp()
+    client.sms.outbox.close()
@@ -0,0 +1,31 @@
+import pytest
+
+from notify_lib.phone import normalize_phone
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("9876543210", "+919876543210"),
+    ("09876543210", "+919876543210"),
+    ("98765 43210", "+919876543210"),
+    ("(987) 654-3210", "+919876543210"),
+    ("919876543210", "+919876543210"),
+    ("+91 98765 43210", "+919876543210"),
+    ("0091-9876543210", "+919876543210"),
+    ("+14155550123", "+14155550123"),
+    ("+4420 7946 0958", "+442079460958"),
+])
+def test_accepted_forms(raw, expected):
+    assert normalize_phone(raw) == expected
+
+
+@pytest.mark.parametrize("raw", [
+    "", None, "98765432", "987654321", "98765432101", "449876543210", "+1234567", "+1234567890123456",
+    "98765abcde", "+91 98765 4321x",
+])
+def test_rejected_forms(raw):
+    assert normalize_phone(raw) is None
+
+
+def test_country_code_applies_to_national_numbers():
+    assert normalize_phone("4155550123", "1") == "+14155550123"
+    assert normalize_phone("14155550123", "1") == "+14155550123"
@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+from notify_lib.client import NotificationClient
+from notify_lib.models.items import SmsItem
+from notify_lib.models.notifications import SmsNotification
+from notify_lib.vendors.rate_limiter import TokenBucket, shared_bucket
+
+
+def test_burst_is_free_then_rate_applies():
+    bucket = TokenBucket(rate=100, burst=5)
+    started = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    assert time.monotonic() - started < 0.02
+    for _ in range(10):
+        bucket.acquire()
+    assert time.monotonic() - started >= 0.09
+
+
+def test_async_callers_share_the_queue():
+    bucket = TokenBucket(rate=200, burst=1)
+
+    async def drain():
+        await asyncio.gather(*(bucket.acquire_async() for _ in range(21)))
+
+    started = time.monotonic()
+    asyncio.run(drain())
+    assert time.monotonic() - started >= 0.09
+
+
+def test_vendors_of_one_account_share_a_bucket():
+    assert shared_bucket(("twofactor", "k"), None) is None
+    bucket = shared_bucket(("twofactor", "k"), 10)
+    assert bucket.burst == 10
+    assert shared_bucket(("twofactor", "k"), 10) is bucket
+    assert shared_bucket(("twofactor", "k"), 20) is not bucket
+    assert shared_bucket(("twofactor", "other"), 20) is not shared_bucket(("twofactor", "k"), 20)
+
+
+def test_rate_limit_paces_sends_to_the_provider(provider):
+    client = NotificationClient({"sms": {"providers": [
+        provider("twofactor", rate_limit=100, rate_burst=1, credentials={"api_key": "paced"})]}})
+    notification = SmsNotification(sender_id="NOTIFY")
+    for i in range(21):
+        notification.add_item(SmsItem(f"98765{i:05d}", "hello"))
+    started = time.monotonic()
+    client.sms.process(notification)
+    assert time.monotonic() - started >= 0.19
+    assert all(item.delivery_status == "SENT" for item in notification.items)
@@ -0,0 +1,133 @@
+import asyncio
+from collections import Counter
+
+import pytest
+
+from benchmarks.standin import StandinServer
+from notify_lib.client import NotificationClient
+from notify_lib.models.items import EmailItem, SmsItem
+from notify_lib.models.notifications import EmailNotification, SmsNotification
+from notify_lib.reconciliation import DELIVERED, UNDELIVERED, DeliveryIndex, DeliveryReport
+
+
+def sent(recipient, ext_id):
+    item = EmailItem(recipient, "hello", subject="hi")
+    item.delivery_status = "SENT"
+    item.ext_id = ext_id
+    return item
+
+
+@pytest.fixture
+def reporting():
+    server = StandinServer(seed=3, track_deliveries=True, undelivered_rate=0.3).start()
+    yield server
+    server.stop()
+
+
+def client_for(server, **options):
+    return NotificationClient({
+        "sms": {"providers": [{
+            "name": "twofactor", "credentials": {"api_key": "key"},
+            "options": dict(server.provider_options(), **options)}]},
+        "email": {"providers": [{
+            "name": "sendgrid", "credentials": {"api_key": "key", "from_email": "sender@example.com"},
+            "options": server.provider_options()}]},
+        "reconciliation": {"poll_batch_size": 30},
+    })
+
+
+def test_polling_settles_every_sent_sms(reporting):
+    client = client_for(reporting)
+    notification = SmsNotification(sender_id="NOTIFY")
+    for i in range(50):
+        notification.add_item(SmsItem(f"98765{i:05d}", "hello"))
+    client.sms.process(notification)
+    assert len(client.sms.deliveries) == 50
+
+    assert len(client.sms.poll_deliveries()) == 30
+    assert len(asyncio.run(client.sms.async_poll_deliveries())) == 20
+    assert len(client.sms.deliveries) == 0
+    statuses = Counter(item.delivery_status for item in notification.items)
+    assert set(statuses) == {DELIVERED, UNDELIVERED}
+    outcomes = {ext_id: status for ext_id, ((_, status),) in reporting.outcomes.items()}
+    assert all(item.delivery_status == outcomes[item.ext_id] for item in notification.items)
+
+
+def test_webhook_reports_settle_shared_ext_ids(reporting):
+    client = client_for(reporting, bulk_sms=True)
+    notification = SmsNotification(sender_id="NOTIFY")
+    for i in range(20):
+        notification.add_item(SmsItem(f"98766{i:05d}", "hello"))
+    client.sms.process(notification)
+    assert len({item.ext_id for item in notification.items}) == 1
+    # One polled status cannot tell the recipients of a bulk send apart, so it is not polled
+    requests = reporting.requests
+    assert client.sms.poll_deliveries() == []
+    assert reporting.requests == requests
+    client.sms.ingest_reports(reporting.twofactor_reports(), provider="twofactor")
+    assert len(client.sms.deliveries) == 0
+    assert all(item.delivery_status in (DELIVERED, UNDELIVERED) for item in notification.items)
+
+    email = EmailNotification()
+    for i in range(40):
+        email.add_item(EmailItem(f"User{i}@example.com", "hello", subject="hi"))
+    client.email.process(email)
+    events = reporting.sendgrid_events() + [{"event": "processed", "email": "x", "sg_message_id": "unknown"}]
+    assert len(client.email.ingest_reports(events)) == 40
+    assert len(client.email.deliveries) == 0
+
+
+def test_accounts_of_one_provider_are_tracked_apart(reporting):
+    account = {"name": "twofactor", "options": reporting.provider_options()}
+    client = NotificationClient({
+        "sms": {"dispatch": "weighted", "providers": [
+            dict(account, credentials={"api_key": "key-a"}), dict(account, credentials={"api_key": "key-b"})]},
+        "reconciliation": {"poll_batch_size": 100},
+    })
+    notification = SmsNotification(sender_id="NOTIFY")
+    for i in range(40):
+        notification.add_item(SmsItem(f"98765{i:05d}", "hello"))
+    client.sms.process(notification)
+    first = set(client.sms.deliveries.pending("twofactor", 100))
+    second = set(client.sms.deliveries.pending("twofactor#2", 100))
+    assert first and second and not first & second
+    assert first | second == {item.ext_id for item in notification.items}
+
+    settled = client.sms.ingest_reports(reporting.twofactor_reports(), provider="twofactor#2")
+    assert {item.ext_id for item in settled} == second
+    assert {item.ext_id for item in client.sms.poll_deliveries()} == first
+    assert len(client.sms.deliveries) == 0
+    with pytest.raises(ValueError):
+        client.sms.ingest_reports([], provider="twofactor#3")
+
+
+def test_report_for_another_recipient_does_not_settle_item():
+    index = DeliveryIndex()
+    item = sent("to@example.com", "m1")
+    index.track("sendgrid", [item])
+    assert index.apply("sendgrid", [DeliveryReport("m1", UNDELIVERED, "cc@example.com")]) == []
+    assert item.delivery_status == "SENT"
+    assert index.apply("sendgrid", [DeliveryReport("m1", DELIVERED, "TO@example.com")]) == [item]
+    assert len(index) == 0
+
+
+def test_eviction_follows_insertion_order_across_vendors():
+    index = DeliveryIndex(max_entries=3)
+    index.track("a", [sent("1@x.com", "a1"), sent("2@x.com", "a2")])
+    index.track("b", [sent("3@x.com", "b1"), sent("4@x.com", "b2")])
+    assert len(index) == 3
+    assert index.pending("a", 10) == ["a2"]
+    assert index.pending("b", 10) == ["b1", "b2"]
+
+
+def test_pending_polls_oldest_first_round_robin():
+    index = DeliveryIndex()
+    index.track("a", [sent(f"{i}@x.com", f"m{i}") for i in range(5)])
+    assert index.pending("a", 2) == ["m0", "m1"]
+    assert index.pending("a", 2) == ["m2", "m3"]
+    index.apply("a", [DeliveryReport("m0", DELIVERED)])
+    assert index.pending("a", 3) == ["m4", "m1", "m2"]
+    # Entries keep insertion order, so eviction still takes the oldest
+    index.max_entries = 2
+    index.track("a", [sent("9@x.com", "m9")])
+    assert sorted(index.pending("a", 10)) == ["m4", "m9"]
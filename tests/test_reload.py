@@ -0,0 +1,136 @@
+import asyncio
+import copy
+import threading
+
+import pytest
+
+from notify_lib.client import NotificationClient
+from notify_lib.services.service_factory import ServiceFactory
+
+
+@pytest.fixture
+def config(provider, tmp_path):
+    return {
+        "sms": {"providers": [provider("twofactor", rate_limit=1000, adaptive={"target_latency": 1})]},
+        "email": {"providers": [provider("sendgrid")]},
+        "idempotency": {"backend": "sqlite", "path": str(tmp_path / "idempotency.db")},
+        "outbox": {"path": str(tmp_path / "outbox.db"), "poll_interval": 0.01},
+    }
+
+
+def test_unchanged_settings_keep_pools_buckets_and_breakers(config, sms):
+    client = NotificationClient(copy.deepcopy(config))
+    old = client.sms
+    old.process(sms(3))
+    old.breakers[old.vendor].failures = 2
+    changed = copy.deepcopy(config)
+    changed["sms"]["providers"][0]["credentials"]["api_key"] = "rotated"
+    client.reload(changed)
+    new = client.sms
+    assert new is not old and new.vendor is not old.vendor
+    assert new.vendor.api_key == "rotated"
+    assert new.vendor.session is old.vendor.session
+    assert new.vendor.async_transport is old.vendor.async_transport
+    assert new.vendor.rate_limiter is old.vendor.rate_limiter
+    assert new.vendor.adaptive is old.vendor.adaptive
+    assert new.breakers[new.vendor] is old.breakers[old.vendor]
+    assert new.breakers[new.vendor].failures == 2
+    assert new.idempotency is old.idempotency
+    # Email was never used, so it is not built
+    assert "_email" not in client.__dict__
+    old.retire(new).join(5)
+    assert new.process(sms(2, 10)).items[0].delivery_status == "SENT"
+
+
+def test_accounts_of_one_provider_keep_their_own_state(config):
+    config["sms"]["providers"] = [
+        dict(config["sms"]["providers"][0], credentials={"api_key": key}) for key in ("key-a", "key-b")]
+    client = NotificationClient(copy.deepcopy(config))
+    old = client.sms
+    first, second = old.vendors
+    old.breakers[first].failures = 1
+    old.breakers[second].failures = 2
+    changed = copy.deepcopy(config)
+    changed["sms"]["providers"][0]["timeout"] = 10
+    client.reload(changed)
+    new = client.sms
+    assert [new.accounts[vendor] for vendor in new.vendors] == ["twofactor", "twofactor#2"]
+    assert new.vendors[0] is not first and new.vendors[1] is second
+    assert new.vendors[0].api_key == "key-a"
+    assert new.vendors[0].rate_limiter is first.rate_limiter
+    assert new.vendors[0].adaptive is first.adaptive
+    assert new.breakers[new.vendors[0]].failures == 1
+    assert new.breakers[second].failures == 2
+
+
+def test_retired_service_closes_what_was_not_adopted(config, tmp_path, sms):
+    client = NotificationClient(copy.deepcopy(config))
+    old = client.sms
+    session_closed = threading.Event()
+    session = old.vendor.session
+    close = session.close
+    session.close = lambda: (close(), session_closed.set())
+    store_closed = threading.Event()
+    store = old.idempotency
+    close_store = store.close
+    store.close = lambda: (close_store(), store_closed.set())
+
+    results = []
+    sending = threading.Thread(target=lambda: results.extend(old.send_many([sms(20, i * 20) for i in range(4)])))
+    sending.start()
+    changed = copy.deepcopy(config)
+    changed["sms"]["providers"][0]["pool_size"] = 3
+    changed["idempotency"]["path"] = str(tmp_path / "other.db")
+    client.reload(changed)
+    sending.join()
+    assert session_closed.wait(5)
+    assert store_closed.wait(5)
+    assert sum(item.delivery_status == "SENT" for result in results for item in result.items) == 80
+    assert client.sms.vendor.session is not session
+    assert client.sms.process(sms(2, 100)).items[0].delivery_status == "SENT"
+
+
+def test_reload_waits_for_direct_async_send(config, standin, sms):
+    standin.latency = 0.02
+    client = NotificationClient(copy.deepcopy(config))
+    old = client.sms
+    changed = copy.deepcopy(config)
+    changed["sms"]["providers"][0]["timeout"] = 10
+
+    async def send():
+        sending = asyncio.ensure_future(old.async_send(sms(40)))
+        await asyncio.sleep(0.01)
+        client.reload(changed)
+        return await sending
+
+    notification = asyncio.run(send())
+    assert client.sms.vendor.async_transport is not old.vendor.async_transport
+    assert [item.delivery_status for item in notification.items] == ["SENT"] * 40
+
+
+def test_outbox_handler_moves_only_on_swap(config):
+    client = NotificationClient(copy.deepcopy(config))
+    old = client.sms
+    outbox = old.outbox
+    assert outbox.handlers["sms"] == old.process_due
+    # Building a replacement does not take over the outbox
+    ServiceFactory.build_service("sms", client.config, previous=old, previous_config=client.config)
+    assert outbox.handlers["sms"] == old.process_due
+    client.reload(copy.deepcopy(config))
+    assert outbox.handlers["sms"] == client.sms.process_due
+    client.reload({"email": config["email"], "outbox": config["outbox"]})
+    assert "sms" not in outbox.handlers
+    with pytest.raises(ValueError):
+        client.sms
+    outbox.close()
+
+
+def test_invalid_config_changes_nothing(config):
+    client = NotificationClient(copy.deepcopy(config))
+    service = client.sms
+    bad = copy.deepcopy(config)
+    bad["sms"]["providers"][0]["timeout"] = -1
+    with pytest.raises(ValueError):
+        client.reload(bad)
+    assert client.sms is service
+    assert client.config.sms.providers[0].timeout == config["sms"]["providers"][0].get("timeout", 30)
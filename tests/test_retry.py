@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from notify_lib.client import NotificationClient
+from notify_lib.constants import ErrorCategory
+from notify_lib.models.items import EmailItem
+from notify_lib.models.notifications import EmailNotification
+from notify_lib.services.retry import RetryPolicy
+
+
+def fail(items, category=ErrorCategory.THROTTLED.value):
+    for item in items:
+        item.delivery_status = "FAILED"
+        item.error = "busy"
+        item.error_category = category
+
+
+def test_transient_failures_are_retried_until_sent(sms):
+    calls = []
+
+    def send(batch):
+        calls.append(len(batch.items))
+        for item in batch.items:
+            item.delivery_status = "SENT"
+        if len(calls) == 1:
+            fail(batch.items[1:])
+
+    notification = RetryPolicy(max_retries=2, backoff=0).run(send, sms(3))
+    assert calls == [3, 2]
+    assert [item.delivery_status for item in notification.items] == ["SENT"] * 3
+
+
+def test_permanent_failures_and_exhausted_retries_stop(sms):
+    calls = []
+
+    def send(batch):
+        calls.append(len(batch.items))
+        fail(batch.items)
+        if len(calls) == 1:
+            fail(batch.items[:1], ErrorCategory.CLIENT.value)
+
+    notification = RetryPolicy(max_retries=2, backoff=0).run(send, sms(3))
+    assert calls == [3, 2, 2]
+    assert all(item.error == "busy" for item in notification.items)
+
+
+def test_deadline_stops_retries(sms):
+    calls = []
+
+    def send(batch):
+        calls.append(len(batch.items))
+        fail(batch.items)
+
+    RetryPolicy(max_retries=5, backoff=10, backoff_max=10).run(send, sms(1), deadline=0)
+    assert calls == [1]
+
+
+def test_raising_retry_keeps_the_previous_error(sms):
+    calls = []
+
+    def send(batch):
+        calls.append(len(batch.items))
+        if len(calls) % 2 == 0:
+            raise ConnectionError("reset")
+        fail(batch.items)
+
+    notification = sms(2)
+    with pytest.raises(ConnectionError):
+        RetryPolicy(max_retries=1, backoff=0).run(send, notification)
+    assert [item.delivery_status for item in notification.items] == ["FAILED"] * 2
+    assert all(item.error == "busy" for item in notification.items)
+
+    async def async_send(batch):
+        send(batch)
+
+    notification = sms(2)
+    with pytest.raises(ConnectionError):
+        asyncio.run(RetryPolicy(max_retries=1, backoff=0).async_run(async_send, notification))
+    assert all(item.error_category == ErrorCategory.THROTTLED.value for item in notification.items)
+
+
+def test_throttled_sends_are_retried_against_the_provider(standin, provider, sms):
+    standin.throttle_rate = 0.3
+    client = NotificationClient({"sms": {"providers": [
+        provider("twofactor", max_retries=6, retry_backoff=0.001, retry_backoff_max=0.002)]}})
+    notification = client.sms.process(sms(40))
+    assert standin.requests > 40
+    assert [item.delivery_status for item in notification.items] == ["SENT"] * 40
+
+
+def test_rejected_email_content_is_a_client_error_on_both_paths(standin, provider):
+    client = NotificationClient({"email": {"providers": [
+        provider("sendgrid", max_retries=2, retry_backoff=0.001), provider("sendgrid", max_retries=2)]}})
+
+    def email():
+        notification = EmailNotification()
+        notification.add_item(EmailItem("user@example.com", "SG.abcdef.ghijkl", subject="hi"))
+        return notification
+
+    for notification in (client.email.process(email()), asyncio.run(client.email.async_process(email()))):
+        (item,) = notification.items
+        assert item.delivery_status == "FAILED"
+        assert item.error_category == ErrorCategory.CLIENT.value
+    assert standin.requests == 0
+    assert all(breaker.failures == 0 for breaker in client.email.breakers.values())
@@ -0,0 +1,31 @@
+import asyncio
+
+from notify_lib.client import NotificationClient
+from notify_lib.models.items import EmailItem
+from notify_lib.models.notifications import EmailNotification
+
+
+def test_stream_sends_in_chunks(standin, provider, sms):
+    client = NotificationClient({"sms": {"providers": [provider("twofactor")]}})
+    items = list(client.sms.send_stream(sms(0), iter(sms(25).items), chunk_size=10))
+    assert [item.delivery_status for item in items] == ["SENT"] * 25
+    assert standin.requests == 25
+
+
+def test_stream_rejects_chunks_failing_the_safety_check(standin, provider):
+    config = provider("sendgrid")
+    del config["credentials"]["from_email"]
+    client = NotificationClient({"email": {"providers": [config]}})
+    notification = EmailNotification(from_email="not-an-address")
+    items = [EmailItem(f"user{i}@example.com", "hello", subject="hi") for i in range(5)]
+    streamed = list(client.email.send_stream(notification, items, chunk_size=2))
+    assert [item.delivery_status for item in streamed] == ["REJECTED"] * 5
+    assert streamed[0].error == "Notification failed the safety check"
+    assert standin.requests == 0
+
+    fresh = [EmailItem(f"user{i}@example.com", "hello", subject="hi") for i in range(5)]
+
+    async def collect():
+        return [item async for item in client.email.async_send_stream(notification, fresh, chunk_size=2)]
+
+    assert [item.delivery_status for item in asyncio.run(collect())] == ["REJECTED"] * 5
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from notify_lib.client import NotificationClient
+from notify_lib.models.items import EmailItem, SmsItem
+from notify_lib.models.notifications import EmailNotification, SmsNotification
+from notify_lib.templates import MessageTemplate, TemplateCache
+
+
+def test_template_renders_variables_and_item_fields():
+    template = MessageTemplate("Hi {name}, your code is {otp}")
+    assert template.fields == ("name", "otp")
+    assert template.render({"name": "Asha"}, SmsItem("9876543210", otp="4321")) == "Hi Asha, your code is 4321"
+    with pytest.raises(ValueError, match="Missing template variable: name"):
+        template.render({}, SmsItem("9876543210", otp="4321"))
+
+
+def test_malformed_template_is_rejected():
+    with pytest.raises(ValueError):
+        MessageTemplate("Hi {user.name}")
+    with pytest.raises(ValueError):
+        MessageTemplate("Hi {name")
+
+
+def test_cache_resolves_ids_then_text():
+    cache = TemplateCache(max_entries=2, templates={"shipped": "Order {order} shipped"})
+    assert cache.get("shipped").text == "Order {order} shipped"
+    assert cache.get("Hi {name}") is cache.get("Hi {name}")
+    with pytest.raises(ValueError, match="not a registered template ID"):
+        cache.get("shiped")
+
+
+def test_pipeline_renders_and_rejects(provider):
+    client = NotificationClient({
+        "sms": {"providers": [provider("twofactor")]},
+        "email": {"providers": [provider("sendgrid")]},
+        "templates": {"templates": {"shipped": "Hi {name}, order #{order} has shipped."}},
+    })
+    notification = SmsNotification(sender_id="NOTIFY")
+    notification.add_item(SmsItem("9876500001", message_template="shipped", variables={"name": "Asha", "order": 42}))
+    notification.add_item(SmsItem("9876500002", message_template="shiped", variables={"name": "Ravi", "order": 7}))
+    notification.add_item(SmsItem("9876500003", message_template="shipped", variables={"name": "Ravi"}))
+    notification.add_item(SmsItem("9876500004"))
+    client.sms.process(notification)
+    rendered, typo, missing, empty = notification.items
+    assert rendered.delivery_status == "SENT"
+    assert rendered.message == "Hi Asha, order #42 has shipped."
+    assert typo.delivery_status == "REJECTED"
+    assert typo.message is None
+    assert "not a registered template ID" in typo.error
+    assert missing.error == "Missing template variable: order"
+    assert empty.error == "Missing message or message template"
+
+    email = EmailNotification()
+    email.add_item(EmailItem("user@example.com", subject="hi"))
+    client.email.process(email)
+    assert email.items[0].delivery_status == "REJECTED"
+    assert email.items[0].error == "Missing message or message template"
+
+
+def test_direct_send_renders_templates(provider):
+    client = NotificationClient({
+        "sms": {"providers": [provider("twofactor")]},
+        "templates": {"templates": {"shipped": "Hi {name}, order #{order} has shipped."}},
+    })
+    notification = SmsNotification(sender_id="NOTIFY")
+    notification.add_item(SmsItem("9876500001", message_template="shipped", variables={"name": "Asha", "order": 42}))
+    notification.add_item(SmsItem("9876500002", message_template="shipped", variables={"name": "Ravi"}))
+    client.sms.send(notification)
+    rendered, missing = notification.items
+    assert rendered.delivery_status == "SENT"
+    assert rendered.message == "Hi Asha, order #42 has shipped."
+    assert missing.delivery_status == "REJECTED"
+    assert missing.error == "Missing template variable: order"
+
+    notification = SmsNotification(sender_id="NOTIFY")
+    notification.add_item(SmsItem("9876500003", message_template="shipped", variables={"name": "Ravi", "order": 7}))
+    asyncio.run(client.sms.async_send(notification))
+    assert notification.items[0].delivery_status == "SENT"
+    assert notification.items[0].message == "Hi Ravi, order #7 has shipped."
@@ -0,0 +1,50 @@
+import asyncio
+import gc
+import warnings
+
+from notify_lib.client import NotificationClient
+from notify_lib.models.items import EmailItem, SmsItem
+from notify_lib.models.notifications import EmailNotification, SmsNotification
+
+
+def test_sessions_close_with_their_event_loop(provider):
+    client = NotificationClient({
+        "sms": {"providers": [provider("twofactor")]},
+        "email": {"providers": [provider("sendgrid")]},
+    })
+    sessions = []
+
+    async def send(i):
+        sms = SmsNotification(sender_id="NOTIFY").add_item(SmsItem(f"98765{i:05d}", "hello"))
+        email = EmailNotification().add_item(EmailItem(f"user{i}@example.com", "hello", subject="hi"))
+        await client.sms.async_process(sms)
+        await client.email.async_process(email)
+        loop = asyncio.get_running_loop()
+        for vendor in client.sms.vendors + client.email.vendors:
+            sessions.append(vendor.async_transport._loop_state[loop][1])
+        return sms.items[0].delivery_status, email.items[0].delivery_status
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        # A fresh loop per call and no aclose, as sync callers using asyncio.run do
+        for i in range(3):
+            assert asyncio.run(send(i)) == ("SENT", "SENT")
+        gc.collect()
+    assert len(sessions) == 6
+    assert all(session.closed for session in sessions)
+    assert not [w for w in caught if "Unclosed" in str(w.message)]
+
+
+def test_close_from_another_thread_closes_running_loop_session(provider):
+    client = NotificationClient({"sms": {"providers": [provider("twofactor")]}})
+
+    async def send():
+        notification = SmsNotification(sender_id="NOTIFY").add_item(SmsItem("9876500001", "hello"))
+        await client.sms.async_process(notification)
+        (vendor,) = client.sms.vendors
+        session = vendor.async_transport._loop_state[asyncio.get_running_loop()][1]
+        await asyncio.get_running_loop().run_in_executor(None, vendor.close)
+        await asyncio.sleep(0.01)
+        return session.closed
+
+    assert asyncio.run(send())